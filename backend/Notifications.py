@@ -1,30 +1,51 @@
 """
 Notification utility functions for the gym management system.
 Import and use these functions in any blueprint to create notifications.
+
+Unread counts are read from notification_counters. Every write here that
+changes how many unread notifications a user has also adjusts that user's
+counter, in the same transaction; writers outside this module must call
+adjust_unread_counts() themselves.
+
+Every helper commits on its own by default. Pass commit=False to add the
+notification to the caller's transaction instead, so it is written (or
+rolled back) together with the change it reports. Fan-outs to many
+recipients should build rows and call create_notifications_bulk().
 """
-from models import db, Notification
+from collections import Counter
+from sqlalchemy import insert, update, delete, select, func, case, literal
+from models import db, User, Notification, NotificationCounter, dialect_insert, dialect_greatest
+from notification_stream import notify_changed
 from datetime import datetime
 
+# Rows per multi-row INSERT in create_notifications_bulk
+BULK_INSERT_CHUNK_SIZE = 1000
 
-def create_notification(user_id, message, link):
+
+def create_notification(user_id, message, link, commit=True):
     """
     Create a notification for a user.
     
     Args:
         user_id (str): The UUID of the user
         message (str): The notification message
+        commit (bool): Commit now; if False the caller's commit writes it
     
     Returns:
         Notification: The created notification object, or None if failed
     """
+    notification = Notification(
+        user_id=user_id,
+        message=message,
+        is_read=False,
+        link=link
+    )
+    db.session.add(notification)
+    adjust_unread_counts({user_id: 1})
+    if not commit:
+        return notification
+    
     try:
-        notification = Notification(
-            user_id=user_id,
-            message=message,
-            is_read=False,
-            link=link
-        )
-        db.session.add(notification)
         db.session.commit()
         return notification
     except Exception as e:
@@ -33,6 +54,51 @@ def create_notification(user_id, message, link):
         return None
 
 
+def create_notifications_bulk(rows, commit=True):
+    """
+    Create many notifications with multi-row INSERTs (executemany), without
+    building ORM objects.
+    
+    Args:
+        rows (iterable): Dicts with user_id, message and optionally link
+        commit (bool): Commit now; if False the caller's commit writes them
+    
+    Returns:
+        int: Number of notifications created (0 if the commit failed)
+    """
+    batch = []
+    count = 0
+    per_user = Counter()
+    try:
+        for row in rows:
+            per_user[row['user_id']] += 1
+            batch.append({
+                'user_id': row['user_id'],
+                'message': row['message'],
+                'link': row.get('link'),
+                'is_read': False
+            })
+            if len(batch) >= BULK_INSERT_CHUNK_SIZE:
+                db.session.execute(insert(Notification), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(Notification), batch)
+            count += len(batch)
+        adjust_unread_counts(per_user)
+        notify_changed(per_user.keys())
+        
+        if commit:
+            db.session.commit()
+        return count
+    except Exception as e:
+        if not commit:
+            raise
+        db.session.rollback()
+        print(f"Error creating notifications: {e}")
+        return 0
+
+
 def get_user_notifications(user_id, unread_only=False, limit=None):
     """
     Get notifications for a user.
@@ -69,12 +135,21 @@ def mark_as_read(notification_id):
         bool: True if successful, False otherwise
     """
     try:
-        notification = Notification.query.get(notification_id)
-        if notification:
-            notification.is_read = True
-            db.session.commit()
-            return True
-        return False
+        # Only the call that actually flips is_read gets a row back and adjusts the counter
+        user_id = db.session.execute(
+            update(Notification).where(
+                Notification.id == notification_id,
+                Notification.is_read == False
+            ).values(is_read=True).returning(Notification.user_id)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if user_id is None:
+            return db.session.query(Notification.query.filter_by(id=notification_id).exists()).scalar()
+        
+        adjust_unread_counts({user_id: -1})
+        notify_changed([user_id])
+        db.session.commit()
+        return True
     except Exception as e:
         db.session.rollback()
         print(f"Error marking notification as read: {e}")
@@ -96,6 +171,8 @@ def mark_all_as_read(user_id):
             user_id=user_id, 
             is_read=False
         ).update({'is_read': True})
+        adjust_unread_counts({user_id: -count})
+        notify_changed([user_id])
         db.session.commit()
         return count
     except Exception as e:
@@ -104,82 +181,191 @@ def mark_all_as_read(user_id):
         return 0
 
 
+def delete_notification(notification_id, commit=True):
+    """
+    Delete a notification.
+    
+    Args:
+        notification_id (int): The ID of the notification
+        commit (bool): Commit now; if False the caller's commit deletes it
+    
+    Returns:
+        bool: True if a notification was deleted, False otherwise
+    """
+    # The counter is adjusted only by the call whose DELETE removed the row
+    deleted = db.session.execute(
+        delete(Notification).where(Notification.id == notification_id)
+        .returning(Notification.user_id, Notification.is_read)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted is None:
+        return False
+    
+    if not deleted.is_read:
+        adjust_unread_counts({deleted.user_id: -1})
+    notify_changed([deleted.user_id])
+    if not commit:
+        return True
+    
+    try:
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error deleting notification: {e}")
+        return False
+
+
 def get_unread_count(user_id):
     """
     Get the count of unread notifications for a user.
     
+    Served from notification_counters. Writers create the counter of a
+    user who has none (see adjust_unread_counts); users with no writes
+    since counters were introduced get theirs here, from one INSERT ...
+    SELECT count(*) (using ix_notifications_user_unread). If a writer
+    creates the row first, this insert does nothing and the writer's
+    count stands.
+    
     Args:
         user_id (str): The UUID of the user
     
     Returns:
         int: Count of unread notifications
     """
-    return Notification.query.filter_by(
-        user_id=user_id, 
-        is_read=False
-    ).count()
+    stored = select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id)
+    count = db.session.execute(stored).scalar()
+    if count is not None:
+        return count
+    
+    try:
+        db.session.execute(
+            dialect_insert(NotificationCounter).from_select(
+                ['user_id', 'unread_count'],
+                select(literal(user_id), func.count(Notification.id)).where(
+                    Notification.user_id == user_id,
+                    Notification.is_read == False
+                )
+            ).on_conflict_do_nothing(index_elements=['user_id'])
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error storing unread count: {e}")
+        return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+    
+    return db.session.execute(stored).scalar()
+
+
+def adjust_unread_counts(deltas):
+    """
+    Add deltas to users' unread counters within the caller's transaction.
+    Call it after the notification write it reports, since users without a
+    counter row get one holding their full count, which includes that write.
+    
+    Existing counters take one UPDATE. Missing ones are created with an
+    INSERT ... SELECT count(*) that adds the delta instead if another
+    transaction created the row meanwhile, so no concurrent write is lost.
+    
+    Args:
+        deltas (dict): user_id -> change in unread notifications (may be negative)
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    def adjusted():
+        return dialect_greatest(
+            NotificationCounter.unread_count + case(deltas, value=NotificationCounter.user_id, else_=0),
+            0
+        )
+    
+    updated = set(db.session.execute(
+        update(NotificationCounter).where(
+            NotificationCounter.user_id.in_(deltas.keys())
+        ).values(unread_count=adjusted())
+        .returning(NotificationCounter.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    missing = sorted(set(deltas) - updated)
+    if not missing:
+        return
+    
+    unread = select(func.count(Notification.id)).where(
+        Notification.user_id == User.user_id,
+        Notification.is_read == False
+    ).scalar_subquery()
+    db.session.execute(
+        dialect_insert(NotificationCounter).from_select(
+            ['user_id', 'unread_count'],
+            select(User.user_id, unread).where(User.user_id.in_(missing)).order_by(User.user_id)
+        ).on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'unread_count': adjusted()}
+        )
+    )
 
 
 # Pre-defined notification templates for common scenarios
 # Member Notifications
-def notify_booking_confirmed(user_id, session_date, session_time, class_name):
+def notify_booking_confirmed(user_id, session_date, session_time, class_name, commit=True):
     """Create notification for booking confirmation"""
     message = f"Your booking for {class_name} on {session_date} at {session_time} has been confirmed! Don't be late."
     link = "/member/dashboard/bookings"
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 
-def notify_booking_cancelled(user_id, session_date, class_name):
+def notify_booking_cancelled(user_id, session_date, class_name, commit=True):
     """Create notification for booking cancellation"""
     message = f"Your booking for {class_name} on {session_date} has been cancelled. Sorry dude!"
     link = "/member/dashboard/bookings"
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 
-def notify_order_placed(user_id, order_id, total_price):
+def notify_order_placed(user_id, order_id, total_price, commit=True):
     """Create notification for order placement"""
     message = f"Your order #{order_id} has been placed successfully! Total: ${total_price:.2f}"
     link = ""
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 
-def notify_session_reminder(user_id, class_name, session_time):
+def notify_session_reminder(user_id, class_name, session_time, commit=True):
     """Create notification for upcoming session reminder"""
     message = f"Reminder: Your {class_name} session starts at {session_time}! Get ready!"
     link = "/member/dashboard/bookings"
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 
-def notify_membership_expiring(user_id, days_remaining):
+def notify_membership_expiring(user_id, days_remaining, commit=True):
     """Create notification for membership expiry"""
     message = f"Your membership expires in {days_remaining} days. Bro c'mon it's only couple bucks!"
     link = "/member/dashboard/membership"
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 
-def notify_session_cancelled(user_id, class_name, session_date):
+def notify_session_cancelled(user_id, class_name, session_date, commit=True):
     """Create notification when trainer cancels a session"""
     message = f"The {class_name} session scheduled for {session_date} has been cancelled by the trainer. Let me find you another one."
     link = "/member/dashboard/classes"
-    return create_notification(user_id, message, link)
+    return create_notification(user_id, message, link, commit)
 
 # Trainer Notifications
-def notify_new_booking(trainer_id, class_name, session_date, member_username):
+def notify_new_booking(trainer_id, class_name, session_date, member_username, commit=True):
     """Create notification for new booking"""
     message = f"{member_username} has booked your {class_name} session on {session_date}."
     link = "/trainer/dashboard/my-classes"
-    return create_notification(trainer_id, message, link)
+    return create_notification(trainer_id, message, link, commit)
 
-def notify_session_cancelled_by_member(trainer_id, class_name, session_date):
+def notify_session_cancelled_by_member(trainer_id, class_name, session_date, commit=True):
     """Create notification when a member cancels a booking"""
     message = f"A member has cancelled their booking for your {class_name} session on {session_date}."
     link = "/trainer/dashboard/my-classes"
-    return create_notification(trainer_id, message, link)
+    return create_notification(trainer_id, message, link, commit)
 
-def notify_admin_new_trainer_application(admin_id, trainer_name):
+def notify_admin_new_trainer_application(admin_id, trainer_name, commit=True):
     """Create notification for new trainer application"""
     message = f"New trainer application received from {trainer_name}."
     link = "/admin/dashboard/trainer-management"
-    return create_notification(admin_id, message, link)
+    return create_notification(admin_id, message, link, commit)
 
 
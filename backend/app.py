@@ -5,6 +5,10 @@ from config import Config
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 from models import db
+import metrics
+import jobs
+import reference_data
+import notification_stream
 from flask_cors import CORS
 import pytz
 from flask import send_from_directory, current_app
@@ -16,6 +20,7 @@ from blueprints.admin.analytics import analytics_bp
 from blueprints.admin.orders import orders_bp
 from blueprints.admin.bookings import bookings_bp
 from blueprints.admin.admin_trainers import admin_trainers_bp
+from blueprints.admin.metrics import metrics_bp
 from blueprints.members.shop import shop_bp
 from blueprints.members.cart import cart_bp
 from blueprints.members.session_cart import session_cart_bp
@@ -31,12 +36,16 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = '1289'
 app.config['JWT_SECRET_KEY'] = '1289' 
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=60)
+app.config["JWT_TOKEN_LOCATION"] = ["headers"]
 
 jwt = JWTManager(app)
 
 # Load other config
 app.config.from_object(Config)
 db.init_app(app)
+metrics.init_app(app)
+jobs.init_app(app)
+notification_stream.init_app(app)
 lebanon_tz = pytz.timezone("Asia/Beirut")
 
 CORS(
@@ -49,7 +58,7 @@ CORS(
                 "http://localhost:5173",
             ],
             "allow_headers": ["Authorization", "Content-Type", "X-CSRF-TOKEN"],
-            "expose_headers": ["Authorization"],
+            "expose_headers": ["Authorization", "Server-Timing"],
             "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"]
         },
     }
@@ -106,6 +115,7 @@ app.register_blueprint(admin_trainers_bp)
 app.register_blueprint(analytics_bp)
 app.register_blueprint(bookings_bp)
 app.register_blueprint(orders_bp)
+app.register_blueprint(metrics_bp)
 app.register_blueprint(shop_bp)
 app.register_blueprint(cart_bp)
 app.register_blueprint(session_bp)
@@ -119,4 +129,5 @@ app.register_blueprint(profile_bp)
 if __name__ == "__main__":
     with app.app_context():
         db.create_all() 
+        reference_data.refresh()
     app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
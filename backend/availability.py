@@ -0,0 +1,95 @@
+"""
+In-process seat-availability cache for trainer sessions.
+Keyed by session id, it holds max_members/current_bookings/is_active so the
+session browser can read live seat counts without going to the database.
+
+Writers (checkout, cancellations, admin booking changes, session edits)
+capture the new seat counts with session_seats() before they commit and
+put() them once the commit succeeds; entries also expire after
+AVAILABILITY_TTL_SECONDS as a backstop for changes made by other processes.
+"""
+import threading
+import time
+from flask import current_app
+from models import TrainerSession
+
+
+def session_seats(session):
+    """
+    (id, max_members, current_bookings, is_active) of a session, for put().
+    Take it before committing: commit expires the session, and reading it
+    afterwards would cost a SELECT per session.
+    """
+    return session.id, session.max_members, session.current_bookings, session.is_active
+
+
+class AvailabilityCache:
+    """Thread-safe session_id -> (max_members, current_bookings, is_active) map with a TTL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # session_id -> (max_members, current_bookings, is_active, expires_at)
+
+    def _ttl(self):
+        return current_app.config.get('AVAILABILITY_TTL_SECONDS', 30)
+
+    def put(self, session_id, max_members, current_bookings, is_active=True):
+        expires_at = time.monotonic() + self._ttl()
+        with self._lock:
+            self._entries[session_id] = (max_members, current_bookings or 0, is_active, expires_at)
+
+    def put_session(self, session):
+        """Write-through from a TrainerSession (or row) whose attributes are loaded"""
+        self.put(*session_seats(session))
+
+    def invalidate(self, session_ids):
+        with self._lock:
+            for session_id in session_ids:
+                self._entries.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(self, session_ids):
+        """
+        Availability for several sessions; misses and expired entries are
+        loaded in one query. Unknown session ids are left out of the result.
+
+        Returns:
+            dict: session_id -> {'max_members', 'current_bookings', 'spots_remaining', 'is_full', 'is_active'}
+        """
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for session_id in session_ids:
+                entry = self._entries.get(session_id)
+                if entry and entry[3] > now:
+                    found[session_id] = entry[:3]
+
+        missing = [session_id for session_id in session_ids if session_id not in found]
+        if missing:
+            rows = TrainerSession.query.with_entities(
+                TrainerSession.id,
+                TrainerSession.max_members,
+                TrainerSession.current_bookings,
+                TrainerSession.is_active
+            ).filter(TrainerSession.id.in_(missing)).all()
+
+            for row in rows:
+                self.put_session(row)
+                found[row.id] = (row.max_members, row.current_bookings or 0, row.is_active)
+
+        return {
+            session_id: {
+                'max_members': max_members,
+                'current_bookings': current_bookings,
+                'spots_remaining': max(max_members - current_bookings, 0) if is_active else 0,
+                'is_full': current_bookings >= max_members,
+                'is_active': is_active
+            }
+            for session_id, (max_members, current_bookings, is_active) in found.items()
+        }
+
+
+availability_cache = AvailabilityCache()
@@ -5,6 +5,8 @@ import jwt
 from datetime import datetime, timedelta
 from models import Membership, db, Products, ProductCategory, Equipments, EqipmentCategory, User
 from sqlalchemy import and_, or_
+import reference_data
+from reference_data import product_category_name, equipment_category_name
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -48,6 +50,7 @@ def create_product_category():
         category = ProductCategory(name=name, slug=unique_slug)
         db.session.add(category)
         db.session.commit()
+        reference_data.refresh()
         return jsonify({
             'message': 'Product category created successfully',
             'category': {
@@ -85,7 +88,7 @@ def get_products():
             'price': p.price,
             'images': p.images,
             'category_id': p.product_category_id,
-            'category_name': p.category.name if p.category else None,
+            'category_name': product_category_name(p.product_category_id),
             'is_active': p.is_active,
             'created_at': p.created_at.isoformat() if p.created_at else None,
             'updated_at': p.updated_at.isoformat() if p.updated_at else None
@@ -117,7 +120,7 @@ def get_product(product_id):
             'price': product.price,
             'images': product.images,
             'category_id': product.product_category_id,
-            'category_name': product.category.name if product.category else None,
+            'category_name': product_category_name(product.product_category_id),
             'is_active': product.is_active,
             'created_at': product.created_at.isoformat() if product.created_at else None,
             'updated_at': product.updated_at.isoformat() if product.updated_at else None
@@ -267,6 +270,7 @@ def create_equipment_category():
         category = EqipmentCategory(name=name, slug=unique_slug)
         db.session.add(category)
         db.session.commit()
+        reference_data.refresh()
         
         return jsonify({
             'message': 'Equipment category created successfully',
@@ -303,7 +307,7 @@ def get_equipments():
             'description': e.description,
             'images': e.images,
             'category_id': e.equipment_category_id,
-            'category_name': e.category.name if e.category else None,
+            'category_name': equipment_category_name(e.equipment_category_id),
             'is_active': e.is_active,
             'created_at': e.created_at.isoformat() if e.created_at else None,
             'updated_at': e.updated_at.isoformat() if e.updated_at else None
@@ -333,7 +337,7 @@ def get_equipment(equipment_id):
             'description': equipment.description,
             'images': equipment.images,
             'category_id': equipment.equipment_category_id,
-            'category_name': equipment.category.name if equipment.category else None,
+            'category_name': equipment_category_name(equipment.equipment_category_id),
             'is_active': equipment.is_active,
             'created_at': equipment.created_at.isoformat() if equipment.created_at else None,
             'updated_at': equipment.updated_at.isoformat() if equipment.updated_at else None
@@ -453,13 +457,9 @@ def get_product_categories():
     """Get all product categories"""
     try:
         current_user = get_jwt_identity()
-        categories = ProductCategory.query.all()
+        categories = reference_data.get_reference_data().product_categories.values()
         return jsonify({
-            'categories': [{
-                'id': c.id,
-                'name': c.name,
-                'slug': c.slug
-            } for c in categories]
+            'categories': list(categories)
         }), 200
     except Exception as e:
         return jsonify({'error': f'Failed to fetch categories: {str(e)}'}), 500
@@ -471,13 +471,9 @@ def get_equipment_categories():
     """Get all equipment categories"""
     try:
         current_user = get_jwt_identity()
-        categories = EqipmentCategory.query.all()
+        categories = reference_data.get_reference_data().equipment_categories.values()
         return jsonify({
-            'categories': [{
-                'id': c.id,
-                'name': c.name,
-                'slug': c.slug
-            } for c in categories]
+            'categories': list(categories)
         }), 200
     except Exception as e:
         return jsonify({'error': f'Failed to fetch categories: {str(e)}'}), 500
@@ -1,16 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_, func
+import threading
+import time
+from sqlalchemy import and_, or_, not_, func, case, select, update, delete, distinct
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
 
 # Import your models
 from models import (
     db, User, Trainer, TrainerSession, Booking, 
-    ClassType, Notification
+    ClassType, dialect_greatest
+)
+from availability import availability_cache, session_seats
+from cancellations import cancel_session_bookings
+from Notifications import create_notification, create_notifications_bulk
+from reference_data import class_type_name, class_type_summary
+import search
+from scheduling import (
+    find_trainer_overlap, trainer_overlap_message, overlap_enforced_by_database, is_overlap_violation
 )
 
 bookings_bp = Blueprint('bookings', __name__, url_prefix='/api/bookings')
 
+# Sessions' trainers, joined alongside the booking's member (both are users)
+TrainerUser = aliased(User, name='trainer_user')
+
+# Upper bound on bookings touched by one bulk transition
+MAX_BULK_BOOKINGS = 1000
+
+# Dashboard stats for the current day: {date: (stats, expires_at)}
+_dashboard_cache = {}
+_dashboard_lock = threading.Lock()
+
 
 # Helper function to check if current user is admin
 def check_admin_role(user_id):
@@ -32,43 +54,51 @@ def get_booking_dashboard():
         return jsonify({'error': 'Admin access required'}), 403
     
     today = datetime.now().date()
+    ttl = current_app.config.get('DASHBOARD_CACHE_SECONDS', 30)
     
-    # Get statistics
-    total_sessions = TrainerSession.query.filter_by(is_active=True).count()
-    today_sessions = TrainerSession.query.filter(
-        TrainerSession.date == today,
-        TrainerSession.is_active == True
-    ).count()
-    
-    total_bookings = Booking.query.filter_by(status='confirmed').count()
-    upcoming_sessions = TrainerSession.query.filter(
-        TrainerSession.date >= today,
-        TrainerSession.is_active == True
-    ).count()
-    
-    completed_bookings = Booking.query.filter_by(status='completed').count()
-    cancelled_bookings = Booking.query.filter_by(status='cancelled').count()
+    with _dashboard_lock:
+        cached = _dashboard_cache.get(today)
+    if cached and cached[1] > time.monotonic():
+        return jsonify({'stats': cached[0]}), 200
     
-    # Revenue calculation
-    total_revenue = db.session.query(
-        func.sum(TrainerSession.price * Booking.id)
-    ).join(
-        Booking, TrainerSession.id == Booking.session_id
-    ).filter(
-        Booking.status == 'completed'
-    ).scalar() or 0
+    stats = dashboard_stats(today)
+    with _dashboard_lock:
+        _dashboard_cache.clear()
+        _dashboard_cache[today] = (stats, time.monotonic() + ttl)
     
-    return jsonify({
-        'stats': {
-            'total_sessions': total_sessions,
-            'today_sessions': today_sessions,
-            'upcoming_sessions': upcoming_sessions,
-            'total_bookings': total_bookings,
-            'completed_bookings': completed_bookings,
-            'cancelled_bookings': cancelled_bookings,
-            'total_revenue': float(total_revenue)
-        }
-    }), 200
+    return jsonify({'stats': stats}), 200
+
+
+def dashboard_stats(today):
+    """
+    Dashboard numbers from one pass over sessions left-joined to their bookings.
+    
+    Session counts use COUNT(DISTINCT id) because a session appears once per
+    booking; revenue is the sum of session prices over completed bookings.
+    """
+    active = TrainerSession.is_active == True
+    
+    row = db.session.query(
+        func.count(distinct(TrainerSession.id)).filter(active).label('total_sessions'),
+        func.count(distinct(TrainerSession.id)).filter(active, TrainerSession.date == today).label('today_sessions'),
+        func.count(distinct(TrainerSession.id)).filter(active, TrainerSession.date >= today).label('upcoming_sessions'),
+        func.count(Booking.id).filter(Booking.status == 'confirmed').label('total_bookings'),
+        func.count(Booking.id).filter(Booking.status == 'completed').label('completed_bookings'),
+        func.count(Booking.id).filter(Booking.status == 'cancelled').label('cancelled_bookings'),
+        func.sum(TrainerSession.price).filter(Booking.status == 'completed').label('total_revenue')
+    ).select_from(TrainerSession).outerjoin(
+        Booking, Booking.session_id == TrainerSession.id
+    ).one()
+    
+    return {
+        'total_sessions': row.total_sessions,
+        'today_sessions': row.today_sessions,
+        'upcoming_sessions': row.upcoming_sessions,
+        'total_bookings': row.total_bookings,
+        'completed_bookings': row.completed_bookings,
+        'cancelled_bookings': row.cancelled_bookings,
+        'total_revenue': float(row.total_revenue or 0)
+    }
 
 
 @bookings_bp.route('/recent', methods=['GET'])
@@ -83,20 +113,19 @@ def get_recent_bookings():
     limit = request.args.get('limit', 20, type=int)
     
     bookings = db.session.query(
-        Booking, TrainerSession, User, ClassType
+        Booking, TrainerSession, User, TrainerUser
     ).join(
         TrainerSession, Booking.session_id == TrainerSession.id
     ).join(
         User, Booking.member_id == User.user_id
     ).join(
-        ClassType, TrainerSession.class_type_id == ClassType.id
+        TrainerUser, TrainerSession.trainer_id == TrainerUser.user_id
     ).order_by(
         Booking.created_at.desc()
     ).limit(limit).all()
     
     result = []
-    for booking, session, member, class_type in bookings:
-        trainer = User.query.get(session.trainer_id)
+    for booking, session, member, trainer in bookings:
         result.append({
             'booking_id': booking.id,
             'status': booking.status,
@@ -112,7 +141,7 @@ def get_recent_bookings():
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
                 'price': float(session.price),
-                'class_type': class_type.name
+                'class_type': class_type_name(session.class_type_id)
             },
             'trainer': {
                 'id': trainer.user_id,
@@ -143,11 +172,9 @@ def get_all_sessions():
     per_page = request.args.get('per_page', 20, type=int)
     
     query = db.session.query(
-        TrainerSession, User, ClassType
+        TrainerSession, User
     ).join(
         User, TrainerSession.trainer_id == User.user_id
-    ).join(
-        ClassType, TrainerSession.class_type_id == ClassType.id
     )
     
     # Apply filters
@@ -168,7 +195,7 @@ def get_all_sessions():
     paginated = query.paginate(page=page, per_page=per_page, error_out=False)
     
     result = []
-    for session, trainer, class_type in paginated.items:
+    for session, trainer in paginated.items:
         result.append({
             'id': session.id,
             'date': session.date.isoformat(),
@@ -186,11 +213,7 @@ def get_all_sessions():
                 'name': f"{trainer.first_name} {trainer.last_name}",
                 'email': trainer.email
             },
-            'class_type': {
-                'id': class_type.id,
-                'name': class_type.name,
-                'description': class_type.description
-            }
+            'class_type': class_type_summary(session.class_type_id)
         })
     
     return jsonify({
@@ -213,9 +236,12 @@ def get_session_details(session_id):
     if not check_admin_role(current_user_id):
         return jsonify({'error': 'Admin access required'}), 403
     
-    session = TrainerSession.query.get_or_404(session_id)
-    trainer = User.query.get(session.trainer_id)
-    class_type = ClassType.query.get(session.class_type_id)
+    row = db.session.query(TrainerSession, User).join(
+        User, TrainerSession.trainer_id == User.user_id
+    ).filter(
+        TrainerSession.id == session_id
+    ).first_or_404()
+    session, trainer = row
     
     # Get all bookings for this session
     bookings = db.session.query(Booking, User).join(
@@ -257,11 +283,7 @@ def get_session_details(session_id):
                 'email': trainer.email,
                 'phone': trainer.phone
             },
-            'class_type': {
-                'id': class_type.id,
-                'name': class_type.name,
-                'description': class_type.description
-            },
+            'class_type': class_type_summary(session.class_type_id),
             'bookings': members_list
         }
     }), 200
@@ -270,7 +292,13 @@ def get_session_details(session_id):
 @bookings_bp.route('/sessions/<int:session_id>', methods=['DELETE'])
 @jwt_required()
 def delete_session(session_id):
-    """Delete a training session (admin only)"""
+    """
+    Delete a training session (admin only)
+    Query params:
+        - force: true to cancel confirmed bookings (notifying members) first
+    Sessions that still have booking history are deactivated instead of
+    removed, since bookings keep referencing them.
+    """
     current_user_id = get_jwt_identity()
     
     if not check_admin_role(current_user_id):
@@ -290,34 +318,33 @@ def delete_session(session_id):
             return jsonify({
                 'error': 'Cannot delete session with active bookings',
                 'bookings_count': bookings_count,
-                'hint': 'Use ?force=true to cancel all bookings and delete'
+                'hint': 'Use ?force=true to cancel all bookings and deactivate the session'
             }), 400
+    
+    try:
+        if bookings_count > 0 or db.session.query(Booking.query.filter_by(session_id=session_id).exists()).scalar():
+            cancelled = cancel_session_bookings(session, 'admin')
+            db.session.commit()
+            availability_cache.invalidate([session_id])
+            
+            return jsonify({
+                'message': 'Session has bookings, so it was deactivated instead of deleted',
+                'deactivated': True,
+                'cancelled': cancelled
+            }), 200
         
-        # Cancel all bookings and notify members
-        bookings = Booking.query.filter_by(
-            session_id=session_id,
-            status='confirmed'
-        ).all()
+        db.session.delete(session)
+        db.session.commit()
+        availability_cache.invalidate([session_id])
         
-        for booking in bookings:
-            booking.status = 'cancelled'
-            
-            # Create notification for member
-            notification = Notification(
-                user_id=booking.member_id,
-                message=f"Your booking for {session.date} at {session.start_time.strftime('%H:%M')} has been cancelled by admin.",
-                link=f"/bookings/{booking.id}"
-            )
-            db.session.add(notification)
-    
-    # Delete the session
-    db.session.delete(session)
-    db.session.commit()
-    
-    return jsonify({
-        'message': 'Session deleted successfully',
-        'cancelled_bookings': bookings_count if bookings_count > 0 else 0
-    }), 200
+        return jsonify({
+            'message': 'Session deleted successfully',
+            'deleted': True
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to delete session: {str(e)}'}), 500
 
 
 @bookings_bp.route('/sessions/<int:session_id>/toggle', methods=['PATCH'])
@@ -331,7 +358,28 @@ def toggle_session_status(session_id):
     
     session = TrainerSession.query.get_or_404(session_id)
     session.is_active = not session.is_active
-    db.session.commit()
+    
+    # Reactivating must not double-book the trainer
+    if session.is_active and not overlap_enforced_by_database():
+        overlapping_session = find_trainer_overlap(
+            session.trainer_id, session.date, session.start_time, session.end_time, exclude_id=session.id
+        )
+        if overlapping_session:
+            db.session.rollback()
+            return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
+    
+    seats = session_seats(session)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_overlap_violation(e):
+            raise
+        overlapping_session = find_trainer_overlap(
+            session.trainer_id, session.date, session.start_time, session.end_time, exclude_id=session.id
+        )
+        return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
+    availability_cache.put(*seats)
     
     return jsonify({
         'message': f"Session {'activated' if session.is_active else 'deactivated'} successfully",
@@ -359,13 +407,13 @@ def get_all_bookings():
     per_page = request.args.get('per_page', 20, type=int)
     
     query = db.session.query(
-        Booking, TrainerSession, User, ClassType
+        Booking, TrainerSession, User, TrainerUser
     ).join(
         TrainerSession, Booking.session_id == TrainerSession.id
     ).join(
         User, Booking.member_id == User.user_id
     ).join(
-        ClassType, TrainerSession.class_type_id == ClassType.id
+        TrainerUser, TrainerSession.trainer_id == TrainerUser.user_id
     )
     
     # Apply filters
@@ -386,8 +434,7 @@ def get_all_bookings():
     paginated = query.paginate(page=page, per_page=per_page, error_out=False)
     
     result = []
-    for booking, session, member, class_type in paginated.items:
-        trainer = User.query.get(session.trainer_id)
+    for booking, session, member, trainer in paginated.items:
         result.append({
             'booking_id': booking.id,
             'status': booking.status,
@@ -404,7 +451,7 @@ def get_all_bookings():
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
                 'price': float(session.price),
-                'class_type': class_type.name
+                'class_type': class_type_name(session.class_type_id)
             },
             'trainer': {
                 'id': trainer.user_id,
@@ -432,11 +479,17 @@ def get_booking_details(booking_id):
     if not check_admin_role(current_user_id):
         return jsonify({'error': 'Admin access required'}), 403
     
-    booking = Booking.query.get_or_404(booking_id)
-    session = TrainerSession.query.get(booking.session_id)
-    member = User.query.get(booking.member_id)
-    trainer = User.query.get(session.trainer_id)
-    class_type = ClassType.query.get(session.class_type_id)
+    booking, session, member, trainer = db.session.query(
+        Booking, TrainerSession, User, TrainerUser
+    ).join(
+        TrainerSession, Booking.session_id == TrainerSession.id
+    ).join(
+        User, Booking.member_id == User.user_id
+    ).join(
+        TrainerUser, TrainerSession.trainer_id == TrainerUser.user_id
+    ).filter(
+        Booking.id == booking_id
+    ).first_or_404()
     
     return jsonify({
         'booking': {
@@ -456,11 +509,7 @@ def get_booking_details(booking_id):
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
                 'price': float(session.price),
-                'class_type': {
-                    'id': class_type.id,
-                    'name': class_type.name,
-                    'description': class_type.description
-                }
+                'class_type': class_type_summary(session.class_type_id)
             },
             'trainer': {
                 'id': trainer.user_id,
@@ -495,14 +544,16 @@ def cancel_booking(booking_id):
         session.current_bookings -= 1
     
     # Notify member
-    notification = Notification(
-        user_id=booking.member_id,
-        message=f"Your booking for {session.date} at {session.start_time.strftime('%H:%M')} has been cancelled by admin.",
-        link=f"/bookings/{booking.id}"
+    create_notification(
+        booking.member_id,
+        f"Your booking for {session.date} at {session.start_time.strftime('%H:%M')} has been cancelled by admin.",
+        f"/bookings/{booking.id}",
+        commit=False
     )
-    db.session.add(notification)
     
+    seats = session_seats(session)
     db.session.commit()
+    availability_cache.put(*seats)
     
     return jsonify({
         'message': 'Booking cancelled successfully',
@@ -548,13 +599,17 @@ def delete_booking(booking_id):
     booking = Booking.query.get_or_404(booking_id)
     
     # Update session bookings count if booking was confirmed
+    session = None
     if booking.status == 'confirmed':
         session = TrainerSession.query.get(booking.session_id)
         if session.current_bookings > 0:
             session.current_bookings -= 1
     
+    seats = session_seats(session) if session else None
     db.session.delete(booking)
     db.session.commit()
+    if seats:
+        availability_cache.put(*seats)
     
     return jsonify({
         'message': 'Booking deleted successfully',
@@ -562,87 +617,337 @@ def delete_booking(booking_id):
     }), 200
 
 
-# ============= TRAINER ANALYTICS =============
-@bookings_bp.route('/trainers/<string:trainer_id>/stats', methods=['GET'])
-@jwt_required()
-def get_trainer_stats(trainer_id):
-    """Get booking statistics for a specific trainer"""
+# ============= BULK BOOKING TRANSITIONS =============
+def bulk_booking_condition(data):
+    """
+    WHERE clause selecting the bookings of a bulk request.
+    
+    The body either lists ids ({"booking_ids": [...]}) or gives a filter
+    ({"filter": {"session_id", "date_from", "date_to", "status"}}) with at
+    least one key, so a request can never match every booking by accident.
+    
+    Returns:
+        tuple: (condition, None) or (None, error message)
+    """
+    booking_ids = data.get('booking_ids')
+    filters = data.get('filter')
+    
+    if booking_ids is not None:
+        if filters is not None:
+            return None, 'Send either booking_ids or filter, not both'
+        # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+        if not isinstance(booking_ids, list) or not booking_ids or not all(type(i) is int for i in booking_ids):
+            return None, 'booking_ids must be a non-empty list of booking ids'
+        if len(booking_ids) > MAX_BULK_BOOKINGS:
+            return None, f'At most {MAX_BULK_BOOKINGS} bookings per request'
+        return Booking.id.in_(booking_ids), None
+    
+    if not isinstance(filters, dict) or not filters:
+        return None, 'booking_ids or filter is required'
+    
+    conditions = []
+    session_conditions = []
+    
+    if filters.get('session_id') is not None:
+        if type(filters['session_id']) is not int:
+            return None, 'filter.session_id must be a session id'
+        conditions.append(Booking.session_id == filters['session_id'])
+    if filters.get('status'):
+        if not isinstance(filters['status'], str):
+            return None, 'filter.status must be a booking status'
+        conditions.append(Booking.status == filters['status'])
+    try:
+        if filters.get('date_from'):
+            session_conditions.append(TrainerSession.date >= datetime.strptime(filters['date_from'], '%Y-%m-%d').date())
+        if filters.get('date_to'):
+            session_conditions.append(TrainerSession.date <= datetime.strptime(filters['date_to'], '%Y-%m-%d').date())
+    except ValueError:
+        return None, 'Invalid date format. Use YYYY-MM-DD'
+    
+    if session_conditions:
+        conditions.append(Booking.session_id.in_(select(TrainerSession.id).where(*session_conditions)))
+    
+    if not conditions:
+        return None, 'filter needs at least one of session_id, date_from, date_to, status'
+    
+    return and_(*conditions), None
+
+
+def release_seats(released):
+    """
+    Give seats back to their sessions in one grouped UPDATE.
+    
+    Args:
+        released (dict): session_id -> number of seats freed
+    """
+    if not released:
+        return
+    
+    db.session.execute(
+        update(TrainerSession).where(
+            TrainerSession.id.in_(released.keys())
+        ).values(
+            current_bookings=dialect_greatest(
+                TrainerSession.current_bookings - case(released, value=TrainerSession.id, else_=0),
+                0
+            )
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def run_bulk_transition(action):
+    """Shared body of the bulk endpoints; action is cancel, complete or delete"""
     current_user_id = get_jwt_identity()
     
     if not check_admin_role(current_user_id):
         return jsonify({'error': 'Admin access required'}), 403
     
-    # Verify trainer exists
-    trainer = User.query.filter_by(user_id=trainer_id, role='Trainer').first_or_404()
+    data = request.get_json() or {}
+    condition, error = bulk_booking_condition(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # Statuses the transition applies to; other matched bookings are reported as skipped
+    eligible = {
+        'cancel': Booking.status == 'confirmed',
+        'complete': Booking.status.in_(('confirmed', 'no_show'))
+    }.get(action)
+    
+    try:
+        skipped = []
+        if eligible is not None:
+            skipped = db.session.execute(
+                select(Booking.id).where(condition, not_(eligible))
+                .order_by(Booking.id).limit(MAX_BULK_BOOKINGS)
+            ).scalars().all()
+            condition = and_(condition, eligible)
+        
+        matched = db.session.query(func.count(Booking.id)).filter(condition).scalar()
+        if matched > MAX_BULK_BOOKINGS:
+            return jsonify({
+                'error': f'{matched} bookings match; narrow the filter to at most {MAX_BULK_BOOKINGS}'
+            }), 400
+        
+        # One set-based statement for the whole batch
+        if action == 'delete':
+            statement = delete(Booking).where(condition)
+        else:
+            statement = update(Booking).where(condition).values(
+                status='cancelled' if action == 'cancel' else 'completed',
+                updated_at=datetime.utcnow()
+            )
+        rows = db.session.execute(
+            statement.returning(Booking.id, Booking.session_id, Booking.member_id, Booking.status)
+            .execution_options(synchronize_session=False)
+        ).all()
+        
+        # Like the single-booking endpoints, only confirmed bookings give their seat back:
+        # every cancelled one was confirmed (RETURNING shows the new status), deleted ones if they still are
+        released = {}
+        if action != 'complete':
+            for row in rows:
+                if action == 'cancel' or row.status == 'confirmed':
+                    released[row.session_id] = released.get(row.session_id, 0) + 1
+        release_seats(released)
+        
+        if action == 'cancel' and rows:
+            sessions = {
+                s.id: s for s in db.session.query(
+                    TrainerSession.id, TrainerSession.date, TrainerSession.start_time
+                ).filter(TrainerSession.id.in_({row.session_id for row in rows}))
+            }
+            create_notifications_bulk(({
+                'user_id': row.member_id,
+                'message': f"Your booking for {sessions[row.session_id].date} at {sessions[row.session_id].start_time.strftime('%H:%M')} has been cancelled by admin.",
+                'link': f"/bookings/{row.id}"
+            } for row in rows), commit=False)
+        
+        db.session.commit()
+        availability_cache.invalidate(released.keys())
+        
+        past_tense = {'cancel': 'cancelled', 'complete': 'completed', 'delete': 'deleted'}[action]
+        
+        return jsonify({
+            'message': f'{len(rows)} booking(s) {past_tense}',
+            'booking_ids': sorted(row.id for row in rows),
+            'skipped': skipped,
+            'seats_released': {str(session_id): count for session_id, count in released.items()}
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to {action} bookings: {str(e)}'}), 500
+
+
+@bookings_bp.route('/bulk/cancel', methods=['PATCH'])
+@jwt_required()
+def bulk_cancel_bookings():
+    """
+    Cancel many confirmed bookings at once (admin override) and notify the members.
+    Completed, no-show and already cancelled bookings are left alone and listed in 'skipped'.
+    Body: {"booking_ids": [1, 2, 3]}
+      or  {"filter": {"session_id": 4, "date_from": "2024-12-01", "date_to": "2024-12-31", "status": "confirmed"}}
+    """
+    return run_bulk_transition('cancel')
+
+
+@bookings_bp.route('/bulk/complete', methods=['PATCH'])
+@jwt_required()
+def bulk_complete_bookings():
+    """
+    Mark many confirmed/no-show bookings as completed
+    Body: same as /bulk/cancel
+    """
+    return run_bulk_transition('complete')
+
+
+@bookings_bp.route('/bulk/delete', methods=['POST'])
+@jwt_required()
+def bulk_delete_bookings():
+    """
+    Delete many bookings permanently; confirmed ones give their seat back
+    Body: same as /bulk/cancel
+    """
+    return run_bulk_transition('delete')
+
+
+# ============= TRAINER ANALYTICS =============
+# Upper bound on trainer ids accepted by /trainers/stats
+MAX_STATS_TRAINERS = 200
+
+
+def trainer_stats(trainer_ids=None):
+    """
+    Booking statistics for several trainers (all trainers if trainer_ids is None)
+    from one query: trainers LEFT JOIN sessions LEFT JOIN bookings, grouped by
+    trainer. Trainers without sessions are included with zero counts.
+    
+    Returns:
+        list: {'trainer': {...}, 'stats': {...}} per trainer, ordered by name
+    """
+    query = db.session.query(
+        User.user_id,
+        User.first_name,
+        User.last_name,
+        User.email,
+        func.count(distinct(TrainerSession.id)).label('total_sessions'),
+        func.count(distinct(TrainerSession.id)).filter(TrainerSession.is_active == True).label('active_sessions'),
+        func.count(Booking.id).label('total_bookings'),
+        func.count(Booking.id).filter(Booking.status == 'completed').label('completed_bookings'),
+        func.sum(TrainerSession.price).filter(Booking.status == 'completed').label('revenue')
+    ).outerjoin(
+        TrainerSession, TrainerSession.trainer_id == User.user_id
+    ).outerjoin(
+        Booking, Booking.session_id == TrainerSession.id
+    ).filter(
+        User.role == 'Trainer'
+    )
+    
+    if trainer_ids is not None:
+        query = query.filter(User.user_id.in_(trainer_ids))
     
-    # Total sessions
-    total_sessions = TrainerSession.query.filter_by(trainer_id=trainer_id).count()
-    active_sessions = TrainerSession.query.filter_by(
-        trainer_id=trainer_id, 
-        is_active=True
-    ).count()
+    rows = query.group_by(
+        User.user_id, User.first_name, User.last_name, User.email
+    ).order_by(User.first_name, User.last_name).all()
     
-    # Total bookings
-    total_bookings = db.session.query(func.count(Booking.id)).join(
-        TrainerSession, Booking.session_id == TrainerSession.id
-    ).filter(
-        TrainerSession.trainer_id == trainer_id
-    ).scalar()
+    result = []
+    for row in rows:
+        avg_attendance = (row.completed_bookings / row.total_bookings * 100) if row.total_bookings > 0 else 0
+        result.append({
+            'trainer': {
+                'id': row.user_id,
+                'name': f"{row.first_name} {row.last_name}",
+                'email': row.email
+            },
+            'stats': {
+                'total_sessions': row.total_sessions,
+                'active_sessions': row.active_sessions,
+                'total_bookings': row.total_bookings,
+                'completed_bookings': row.completed_bookings,
+                'cancelled_bookings': row.total_bookings - row.completed_bookings,
+                'revenue': float(row.revenue or 0),
+                'average_attendance_rate': round(avg_attendance, 2)
+            }
+        })
+    return result
+
+
+@bookings_bp.route('/trainers/stats', methods=['GET'])
+@jwt_required()
+def get_trainers_stats():
+    """
+    Get booking statistics for many trainers in one call
+    Query params:
+        - ids: Comma-separated trainer ids (optional, default all trainers)
+    """
+    current_user_id = get_jwt_identity()
     
-    # Completed bookings
-    completed_bookings = db.session.query(func.count(Booking.id)).join(
-        TrainerSession, Booking.session_id == TrainerSession.id
-    ).filter(
-        TrainerSession.trainer_id == trainer_id,
-        Booking.status == 'completed'
-    ).scalar()
+    if not check_admin_role(current_user_id):
+        return jsonify({'error': 'Admin access required'}), 403
     
-    # Revenue
-    revenue = db.session.query(func.sum(TrainerSession.price)).join(
-        Booking, TrainerSession.id == Booking.session_id
-    ).filter(
-        TrainerSession.trainer_id == trainer_id,
-        Booking.status == 'completed'
-    ).scalar() or 0
+    trainer_ids = None
+    ids_param = request.args.get('ids')
+    if ids_param is not None:
+        trainer_ids = list({i.strip() for i in ids_param.split(',') if i.strip()})
+        if not trainer_ids:
+            return jsonify({'error': 'ids must list at least one trainer id'}), 400
+        if len(trainer_ids) > MAX_STATS_TRAINERS:
+            return jsonify({'error': f'At most {MAX_STATS_TRAINERS} trainer ids per request'}), 400
+    
+    try:
+        return jsonify({'trainers': trainer_stats(trainer_ids)}), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch trainer stats: {str(e)}'}), 500
+
+
+@bookings_bp.route('/trainers/<string:trainer_id>/stats', methods=['GET'])
+@jwt_required()
+def get_trainer_stats(trainer_id):
+    """Get booking statistics for a specific trainer"""
+    current_user_id = get_jwt_identity()
     
-    # Average rating (if you have a rating system)
-    avg_attendance = (completed_bookings / total_bookings * 100) if total_bookings > 0 else 0
+    if not check_admin_role(current_user_id):
+        return jsonify({'error': 'Admin access required'}), 403
     
-    return jsonify({
-        'trainer': {
-            'id': trainer.user_id,
-            'name': f"{trainer.first_name} {trainer.last_name}",
-            'email': trainer.email
-        },
-        'stats': {
-            'total_sessions': total_sessions,
-            'active_sessions': active_sessions,
-            'total_bookings': total_bookings,
-            'completed_bookings': completed_bookings,
-            'cancelled_bookings': total_bookings - completed_bookings,
-            'revenue': float(revenue),
-            'average_attendance_rate': round(avg_attendance, 2)
-        }
-    }), 200
+    stats = trainer_stats([trainer_id])
+    if not stats:
+        return jsonify({'error': 'Trainer not found'}), 404
+    
+    return jsonify(stats[0]), 200
 
 
 # ============= SEARCH & FILTERS =============
 @bookings_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_bookings():
-    """Advanced search for bookings and sessions"""
+    """
+    Advanced search for bookings and sessions, best matches first
+    Query params:
+        - q: Search text, at least 3 characters (class type, trainer or member name/email)
+        - type: all (default), sessions or bookings
+    Shorter queries return empty results, so clients can call this while the user types.
+    """
     current_user_id = get_jwt_identity()
     
     if not check_admin_role(current_user_id):
         return jsonify({'error': 'Admin access required'}), 403
     
-    query_text = request.args.get('q', '')
+    query_text = search.normalize_query(request.args.get('q', ''))
     search_type = request.args.get('type', 'all')  # all, sessions, bookings
     
     results = {'sessions': [], 'bookings': []}
     
+    if query_text is None:
+        results['min_length'] = search.MIN_QUERY_LENGTH
+        return jsonify(results), 200
+    
+    search.set_similarity_threshold()
+    
     if search_type in ['all', 'sessions']:
         # Search sessions by class type or trainer name
+        class_doc = search.class_type_document()
+        trainer_doc = search.person_document(User)
+        
         sessions = db.session.query(
             TrainerSession, User, ClassType
         ).join(
@@ -651,10 +956,12 @@ def search_bookings():
             ClassType, TrainerSession.class_type_id == ClassType.id
         ).filter(
             or_(
-                ClassType.name.ilike(f'%{query_text}%'),
-                User.first_name.ilike(f'%{query_text}%'),
-                User.last_name.ilike(f'%{query_text}%')
+                search.match(class_doc, query_text),
+                search.match(trainer_doc, query_text)
             )
+        ).order_by(
+            search.rank_any(query_text, class_doc, trainer_doc).desc(),
+            TrainerSession.date.desc()
         ).limit(20).all()
         
         for session, trainer, class_type in sessions:
@@ -669,6 +976,8 @@ def search_bookings():
     
     if search_type in ['all', 'bookings']:
         # Search bookings by member name or email
+        member_doc = search.person_document(User)
+        
         bookings = db.session.query(
             Booking, User, TrainerSession
         ).join(
@@ -676,11 +985,10 @@ def search_bookings():
         ).join(
             TrainerSession, Booking.session_id == TrainerSession.id
         ).filter(
-            or_(
-                User.first_name.ilike(f'%{query_text}%'),
-                User.last_name.ilike(f'%{query_text}%'),
-                User.email.ilike(f'%{query_text}%')
-            )
+            search.match(member_doc, query_text)
+        ).order_by(
+            search.rank(member_doc, query_text).desc(),
+            Booking.created_at.desc()
         ).limit(20).all()
         
         for booking, member, session in bookings:
@@ -692,4 +1000,4 @@ def search_bookings():
                 'status': booking.status
             })
     
-    return jsonify(results), 200
\ No newline at end of file
+    return jsonify(results), 200
@@ -0,0 +1,46 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import User
+from metrics import registry
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/api/metrics')
+
+
+def check_admin_role(user_id):
+    """Check if user has admin role"""
+    user = User.query.get(user_id)
+    if not user or user.role != 'Admin':
+        return False
+    return True
+
+
+@metrics_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """
+    Get in-process histograms (latency, query counts) and counters (job progress)
+    Query params:
+        - prefix: only return metrics whose name starts with this (e.g. checkout.process)
+    """
+    current_user_id = get_jwt_identity()
+
+    if not check_admin_role(current_user_id):
+        return jsonify({'error': 'Admin access required'}), 403
+
+    prefix = request.args.get('prefix')
+
+    return jsonify({'metrics': registry.snapshot(prefix)}), 200
+
+
+@metrics_bp.route('/reset', methods=['POST'])
+@jwt_required()
+def reset_metrics():
+    """Clear all collected metrics"""
+    current_user_id = get_jwt_identity()
+
+    if not check_admin_role(current_user_id):
+        return jsonify({'error': 'Admin access required'}), 403
+
+    registry.reset()
+
+    return jsonify({'message': 'Metrics reset successfully'}), 200
@@ -1,10 +1,135 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Products, Cart, CartItem
-from sqlalchemy import func
+from models import db, Products, Cart, CartItem, dialect_insert
+from sqlalchemy import func, select, literal, and_
 
 cart_bp = Blueprint('cart', __name__, url_prefix='/api/cart')
 
+
+MAX_BATCH_OPERATIONS = 100
+
+
+def get_or_create_cart_id(user_id):
+    """
+    Return the id of the user's cart, creating it on first use.
+    
+    Uses INSERT ... ON CONFLICT on the one-cart-per-user constraint, so it is
+    a single statement with no read-then-write race. Does not commit.
+    """
+    # Touching updated_at on conflict marks the cart as active for the sweeper
+    # and makes RETURNING yield a row whether or not the cart existed
+    cart_stmt = dialect_insert(Cart).values(user_id=user_id)
+    return db.session.execute(
+        cart_stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id],
+            set_={'updated_at': func.now()}
+        ).returning(Cart.id)
+    ).scalar_one()
+
+
+def upsert_cart_item(cart_id, product_id, quantity, replace=False):
+    """
+    Add quantity of a product to a cart without a read-then-write.
+    
+    The line is inserted or updated with INSERT ... ON CONFLICT, so concurrent
+    adds of the same product land on one line. Does not commit.
+    
+    Args:
+        cart_id (int): The cart to write to
+        product_id (int): The product to add
+        quantity (int): Quantity to add (or to set, if replace is True)
+        replace (bool): Overwrite the line quantity instead of adding to it
+    
+    Returns:
+        Row (id, product_id, quantity) of the cart line, or None if the
+        product does not exist or is inactive
+    """
+    # Selecting from products means an inactive/missing product inserts nothing
+    item_stmt = dialect_insert(CartItem).from_select(
+        ['cart_id', 'product_id', 'quantity'],
+        select(
+            literal(cart_id),
+            Products.id,
+            literal(quantity)
+        ).where(
+            Products.id == product_id,
+            Products.is_active == True
+        )
+    )
+    
+    if replace:
+        new_quantity = item_stmt.excluded.quantity
+    else:
+        new_quantity = CartItem.quantity + item_stmt.excluded.quantity
+    
+    return db.session.execute(
+        item_stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.product_id],
+            set_={'quantity': new_quantity}
+        ).returning(CartItem.id, CartItem.product_id, CartItem.quantity)
+    ).first()
+
+
+def get_cart_payload(user_id):
+    """
+    Build the cart response body for a user.
+    
+    Line totals and the cart total are computed in SQL in a single query
+    (inactive products are filtered out by the join), so the cost does not
+    grow with the number of lines.
+    """
+    item_total = (Products.price * CartItem.quantity).label('item_total')
+    
+    rows = db.session.query(
+        Cart.id.label('cart_id'),
+        Cart.created_at,
+        CartItem.id,
+        CartItem.product_id,
+        CartItem.quantity,
+        Products.name,
+        Products.images,
+        Products.price,
+        item_total,
+        func.sum(item_total).over().label('total_price')
+    ).outerjoin(
+        CartItem, CartItem.cart_id == Cart.id
+    ).outerjoin(
+        Products, and_(
+            CartItem.product_id == Products.id,
+            Products.is_active == True
+        )
+    ).filter(
+        Cart.user_id == user_id
+    ).order_by(CartItem.id).all()
+    
+    if not rows:
+        return {
+            'cart_id': None,
+            'items': [],
+            'total_items': 0,
+            'total_price': 0
+        }
+    
+    # Lines whose product is gone or inactive come back with NULL product columns
+    items = [{
+        'id': row.id,
+        'product_id': row.product_id,
+        'product_name': row.name,
+        'product_image': row.images[0] if row.images else None,
+        'price': row.price,
+        'quantity': row.quantity,
+        'item_total': row.item_total
+    } for row in rows if row.price is not None]
+    
+    return {
+        'cart_id': rows[0].cart_id,
+        'items': items,
+        'total_items': len(items),
+        'total_price': rows[0].total_price or 0,
+        'created_at': rows[0].created_at.isoformat() if rows[0].created_at else None
+    }
+
+
 # ==================== CART MANAGEMENT ====================
 
 @cart_bp.route('/cart', methods=['GET'])
@@ -14,45 +139,7 @@ def get_cart():
     try:
         user_id = get_jwt_identity()
         
-        # Get or create cart for user
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        
-        if not cart:
-            return jsonify({
-                'cart_id': None,
-                'items': [],
-                'total_items': 0,
-                'total_price': 0
-            }), 200
-        
-        # Get cart items with product details
-        cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-        
-        items = []
-        total_price = 0
-        
-        for item in cart_items:
-            if item.product and item.product.is_active:
-                item_total = item.product.price * item.quantity
-                total_price += item_total
-                
-                items.append({
-                    'id': item.id,
-                    'product_id': item.product_id,
-                    'product_name': item.product.name,
-                    'product_image': item.product.images[0] if item.product.images else None,
-                    'price': item.product.price,
-                    'quantity': item.quantity,
-                    'item_total': item_total
-                })
-        
-        return jsonify({
-            'cart_id': cart.id,
-            'items': items,
-            'total_items': len(items),
-            'total_price': total_price,
-            'created_at': cart.created_at.isoformat() if cart.created_at else None
-        }), 200
+        return jsonify(get_cart_payload(user_id)), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch cart: {str(e)}'}), 500
@@ -82,36 +169,12 @@ def add_to_cart():
         if quantity < 1:
             return jsonify({'error': 'quantity must be at least 1'}), 400
         
-        # Check if product exists and is active
-        product = Products.query.filter_by(id=product_id, is_active=True).first()
-        if not product:
+        cart_id = get_or_create_cart_id(user_id)
+        cart_item = upsert_cart_item(cart_id, product_id, quantity)
+        if not cart_item:
+            db.session.rollback()
             return jsonify({'error': 'Product not found or unavailable'}), 404
         
-        # Get or create cart
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.commit()
-        
-        # Check if product already in cart
-        cart_item = CartItem.query.filter_by(
-            cart_id=cart.id,
-            product_id=product_id
-        ).first()
-        
-        if cart_item:
-            # Update quantity
-            cart_item.quantity += quantity
-        else:
-            # Create new cart item
-            cart_item = CartItem(
-                cart_id=cart.id,
-                product_id=product_id,
-                quantity=quantity
-            )
-            db.session.add(cart_item)
-        
         db.session.commit()
         
         return jsonify({
@@ -128,6 +191,102 @@ def add_to_cart():
         return jsonify({'error': f'Failed to add to cart: {str(e)}'}), 500
 
 
+@cart_bp.route('/cart', methods=['PATCH'])
+@jwt_required()
+def batch_update_cart():
+    """
+    Apply several cart changes in one transaction and return the updated cart
+    Body: {
+        "operations": [
+            {"op": "add", "product_id": 1, "quantity": 2},
+            {"op": "set", "product_id": 2, "quantity": 3},     // or "cart_item_id"
+            {"op": "remove", "cart_item_id": 7}                 // or "product_id"
+        ]
+    }
+    "set" by product_id adds the product if it is not in the cart yet, which
+    makes it suitable for syncing a whole cart restored on the client.
+    If any operation fails, none of them are applied.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        operations = data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per request'}), 400
+        
+        # Validate everything before touching the database
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            
+            if op not in ('add', 'set', 'remove'):
+                return jsonify({'error': f'Operation {index}: op must be add, set or remove'}), 400
+            
+            if op == 'add' and 'product_id' not in operation:
+                return jsonify({'error': f'Operation {index}: product_id is required'}), 400
+            
+            if op in ('set', 'remove') and 'product_id' not in operation and 'cart_item_id' not in operation:
+                return jsonify({'error': f'Operation {index}: product_id or cart_item_id is required'}), 400
+            
+            # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+            for field in ('product_id', 'cart_item_id'):
+                if field in operation and type(operation[field]) is not int:
+                    return jsonify({'error': f'Operation {index}: {field} must be an integer'}), 400
+            
+            if op in ('add', 'set'):
+                quantity = operation.get('quantity', 1)
+                if type(quantity) is not int or quantity < 1:
+                    return jsonify({'error': f'Operation {index}: quantity must be at least 1'}), 400
+        
+        # Single ownership check - every statement below is scoped to this cart
+        cart_id = get_or_create_cart_id(user_id)
+        
+        for index, operation in enumerate(operations):
+            op = operation['op']
+            
+            if op == 'add':
+                if not upsert_cart_item(cart_id, operation['product_id'], operation.get('quantity', 1)):
+                    db.session.rollback()
+                    return jsonify({'error': f'Operation {index}: product not found or unavailable'}), 404
+            
+            elif op == 'set' and 'product_id' in operation:
+                if not upsert_cart_item(cart_id, operation['product_id'], operation.get('quantity', 1), replace=True):
+                    db.session.rollback()
+                    return jsonify({'error': f'Operation {index}: product not found or unavailable'}), 404
+            
+            elif op == 'set':
+                updated = CartItem.query.filter_by(
+                    id=operation['cart_item_id'],
+                    cart_id=cart_id
+                ).update({'quantity': operation.get('quantity', 1)}, synchronize_session=False)
+                
+                if not updated:
+                    db.session.rollback()
+                    return jsonify({'error': f'Operation {index}: cart item not found'}), 404
+            
+            else:
+                query = CartItem.query.filter_by(cart_id=cart_id)
+                if 'cart_item_id' in operation:
+                    query = query.filter_by(id=operation['cart_item_id'])
+                else:
+                    query = query.filter_by(product_id=operation['product_id'])
+                
+                if not query.delete(synchronize_session=False):
+                    db.session.rollback()
+                    return jsonify({'error': f'Operation {index}: cart item not found'}), 404
+        
+        db.session.commit()
+        
+        return jsonify(get_cart_payload(user_id)), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update cart: {str(e)}'}), 500
+
+
 @cart_bp.route('/cart/update/<int:cart_item_id>', methods=['PUT'])
 @jwt_required()
 def update_cart_item(cart_item_id):
@@ -161,6 +320,7 @@ def update_cart_item(cart_item_id):
         
         # Update quantity
         cart_item.quantity = quantity
+        cart.updated_at = func.now()
         db.session.commit()
         
         return jsonify({
@@ -196,6 +356,7 @@ def remove_from_cart(cart_item_id):
         
         # Remove item
         db.session.delete(cart_item)
+        cart.updated_at = func.now()
         db.session.commit()
         
         return jsonify({'message': 'Item removed from cart successfully'}), 200
@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Products, Cart, CartItem, Order, OrderItem
-from models import TrainerSession, SessionCart, SessionCartItem, Booking
+from models import TrainerSession, SessionCart, SessionCartItem, Booking, ClassType
+from sqlalchemy import and_, or_
 from datetime import datetime
+from metrics import timed_stage
+from availability import availability_cache, session_seats
+from reference_data import class_type_name
 from Notifications import notify_booking_cancelled, notify_booking_confirmed, notify_new_booking, notify_order_placed, notify_session_cancelled_by_member
 
 checkout_bp = Blueprint('checkout', __name__, url_prefix='/api/checkout')
@@ -16,58 +20,101 @@ def preview_checkout():
     Preview what will be checked out - shows both product cart and session cart
     """
     try:
-        user_id = get_jwt_identity()
-        
-        # Get product cart
-        product_cart = Cart.query.filter_by(user_id=user_id).first()
-        product_items = []
-        product_total = 0
-        
-        if product_cart:
-            cart_items = CartItem.query.filter_by(cart_id=product_cart.id).all()
-            for item in cart_items:
-                if item.product and item.product.is_active:
-                    item_total = item.product.price * item.quantity
+        with timed_stage('checkout.preview', 'total'):
+            user_id = get_jwt_identity()
+            
+            now = datetime.now()
+            
+            # Get product cart - one joined query, inactive products filtered in SQL
+            with timed_stage('checkout.preview', 'product_cart'):
+                product_rows = db.session.query(
+                    CartItem.id,
+                    CartItem.product_id,
+                    CartItem.quantity,
+                    Products.name,
+                    Products.images,
+                    Products.price
+                ).join(
+                    Cart, CartItem.cart_id == Cart.id
+                ).join(
+                    Products, CartItem.product_id == Products.id
+                ).filter(
+                    Cart.user_id == user_id,
+                    Products.is_active == True
+                ).order_by(CartItem.id).all()
+                
+                product_items = []
+                product_total = 0
+                
+                for row in product_rows:
+                    item_total = row.price * row.quantity
                     product_total += item_total
                     product_items.append({
                         'type': 'product',
-                        'cart_item_id': item.id,
-                        'product_id': item.product_id,
-                        'name': item.product.name,
-                        'image': item.product.images[0] if item.product.images else None,
-                        'price': item.product.price,
-                        'quantity': item.quantity,
+                        'cart_item_id': row.id,
+                        'product_id': row.product_id,
+                        'name': row.name,
+                        'image': row.images[0] if row.images else None,
+                        'price': row.price,
+                        'quantity': row.quantity,
                         'item_total': item_total
                     })
-        
-        # Get session cart
-        session_cart = SessionCart.query.filter_by(user_id=user_id).first()
-        session_items = []
-        session_total = 0
-        
-        if session_cart:
-            cart_items = SessionCartItem.query.filter_by(cart_id=session_cart.id).all()
-            for item in cart_items:
-                session = item.session
-                if session and session.is_active:
-                    # Validate session is still valid
-                    session_datetime = datetime.combine(session.date, session.start_time)
-                    if session_datetime > datetime.now() and not session.is_full:
-                        session_items.append({
-                            'type': 'session',
-                            'cart_item_id': item.id,
-                            'session_id': session.id,
-                            'name': f"{session.class_type.name} with {session.trainer.first_name} {session.trainer.last_name}",
-                            'class_type': session.class_type.name,
-                            'trainer_name': f"{session.trainer.first_name} {session.trainer.last_name}",
-                            'date': session.date.isoformat(),
-                            'start_time': session.start_time.strftime('%H:%M'),
-                            'end_time': session.end_time.strftime('%H:%M'),
-                            'price': session.price,
-                            'spots_remaining': session.spots_remaining,
-                            'item_total': session.price
-                        })
-                        session_total += session.price
+            
+            # Get session cart - one query joining sessions and trainers (class type names come from reference data).
+            # Only active, future sessions with free spots are returned.
+            with timed_stage('checkout.preview', 'session_cart'):
+                session_rows = db.session.query(
+                    SessionCartItem.id.label('cart_item_id'),
+                    TrainerSession.id.label('session_id'),
+                    TrainerSession.date,
+                    TrainerSession.start_time,
+                    TrainerSession.end_time,
+                    TrainerSession.price,
+                    TrainerSession.max_members,
+                    TrainerSession.current_bookings,
+                    TrainerSession.class_type_id,
+                    User.first_name,
+                    User.last_name
+                ).join(
+                    SessionCart, SessionCartItem.cart_id == SessionCart.id
+                ).join(
+                    TrainerSession, SessionCartItem.session_id == TrainerSession.id
+                ).join(
+                    User, TrainerSession.trainer_id == User.user_id
+                ).filter(
+                    SessionCart.user_id == user_id,
+                    TrainerSession.is_active == True,
+                    TrainerSession.current_bookings < TrainerSession.max_members,
+                    or_(
+                        TrainerSession.date > now.date(),
+                        and_(
+                            TrainerSession.date == now.date(),
+                            TrainerSession.start_time > now.time()
+                        )
+                    )
+                ).order_by(SessionCartItem.id).all()
+                
+                session_items = []
+                session_total = 0
+                
+                for row in session_rows:
+                    trainer_name = f"{row.first_name} {row.last_name}"
+                    class_name = class_type_name(row.class_type_id)
+                    session_items.append({
+                        'type': 'session',
+                        'cart_item_id': row.cart_item_id,
+                        'session_id': row.session_id,
+                        'name': f"{class_name} with {trainer_name}",
+                        'class_type': class_name,
+                        'trainer_name': trainer_name,
+                        'date': row.date.isoformat(),
+                        'start_time': row.start_time.strftime('%H:%M'),
+                        'end_time': row.end_time.strftime('%H:%M'),
+                        'price': row.price,
+                        'spots_remaining': row.max_members - row.current_bookings,
+                        'item_total': row.price
+                    })
+                    session_total += row.price
         
         return jsonify({
             'products': {
@@ -103,33 +150,46 @@ def process_checkout():
             "cvv": "123"
         }
     }
+
+    Each stage (cart loading, session validation, payment, order/booking
+    writes, notifications and commit) is timed into the metrics registry.
     """
     try:
-        user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Validation
-        if 'items' not in data:
-            return jsonify({'error': 'items is required'}), 400
-        
-        product_ids = data['items'].get('product_cart_item_ids', [])
-        session_ids = data['items'].get('session_cart_item_ids', [])
+        with timed_stage('checkout.process', 'total'):
+            return _process_checkout()
         
-        if not product_ids and not session_ids:
-            return jsonify({'error': 'No items selected for checkout'}), 400
-        
-        # Simulated payment validation
-        if 'payment_method' not in data:
-            return jsonify({'error': 'payment_method is required'}), 400
-        
-        # Start transaction
-        order = None
-        order_items = []
-        bookings = []
-        total_amount = 0
-        
-        # Process product items
-        if product_ids:
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Checkout failed: {str(e)}'}), 500
+
+
+def _process_checkout():
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    # Validation
+    if 'items' not in data:
+        return jsonify({'error': 'items is required'}), 400
+    
+    product_ids = data['items'].get('product_cart_item_ids', [])
+    session_ids = data['items'].get('session_cart_item_ids', [])
+    
+    if not product_ids and not session_ids:
+        return jsonify({'error': 'No items selected for checkout'}), 400
+    
+    # Simulated payment validation
+    if 'payment_method' not in data:
+        return jsonify({'error': 'payment_method is required'}), 400
+    
+    # Start transaction
+    order = None
+    order_items = []
+    bookings = []
+    total_amount = 0
+    
+    # Process product items
+    if product_ids:
+        with timed_stage('checkout.process', 'load_products'):
             product_cart = Cart.query.filter_by(user_id=user_id).first()
             if not product_cart:
                 return jsonify({'error': 'Product cart not found'}), 404
@@ -158,9 +218,10 @@ def process_checkout():
                     'price': cart_item.product.price,
                     'total': item_total
                 })
-        
-        # Process session items
-        if session_ids:
+    
+    # Process session items
+    if session_ids:
+        with timed_stage('checkout.process', 'validate_sessions'):
             session_cart = SessionCart.query.filter_by(user_id=user_id).first()
             if not session_cart:
                 return jsonify({'error': 'Session cart not found'}), 404
@@ -207,14 +268,16 @@ def process_checkout():
                     'cart_item': cart_item,
                     'session': session
                 })
-    
+
+    with timed_stage('checkout.process', 'payment'):
         payment_success = simulate_payment(data.get('payment_method'), data.get('card_details', {}), total_amount)
-        
-        if not payment_success:
-            return jsonify({'error': 'Payment failed. Please check your payment details.'}), 402
-        
-        # Create order if there are products
-        if order_items:
+    
+    if not payment_success:
+        return jsonify({'error': 'Payment failed. Please check your payment details.'}), 402
+    
+    # Create order if there are products
+    if order_items:
+        with timed_stage('checkout.process', 'write_order'):
             order = Order(
                 user_id=user_id,
                 total_price=sum(item['total'] for item in order_items)
@@ -234,46 +297,61 @@ def process_checkout():
                 
                 # Remove from cart
                 db.session.delete(item_data['cart_item'])
-        
-        # Create bookings for sessions
-        created_bookings = []
-        for booking_data in bookings:
-            session = booking_data['session']
-            
-            # Create booking
-            booking = Booking(
-                member_id=user_id,
-                session_id=session.id,
-                status='confirmed'
-            )
-            db.session.add(booking)
-            
-            # Increment session bookings count
-            session.current_bookings += 1
-            
-            # Remove from cart
-            db.session.delete(booking_data['cart_item'])
+    
+    # Create bookings for sessions
+    new_bookings = []
+    if bookings:
+        with timed_stage('checkout.process', 'write_bookings'):
+            for booking_data in bookings:
+                session = booking_data['session']
+                
+                # Create booking
+                booking = Booking(
+                    member_id=user_id,
+                    session_id=session.id,
+                    status='confirmed'
+                )
+                db.session.add(booking)
+                
+                # Increment session bookings count
+                session.current_bookings += 1
+                
+                # Remove from cart
+                db.session.delete(booking_data['cart_item'])
+                new_bookings.append((booking, session))
             
+            db.session.flush()  # Get booking IDs
+    
+    # Notifications join the checkout transaction and are written by its commit
+    created_bookings = []
+    with timed_stage('checkout.process', 'notifications'):
+        if new_bookings:
+            member = User.query.get(user_id)
+            member_name = f"{member.first_name} {member.last_name}"
+        
+        for booking, session in new_bookings:
             # Notify user of booking confirmation
             notify_booking_confirmed(
                 user_id=user_id,
                 session_date=session.date,
                 session_time=session.start_time.strftime('%H:%M'),
-                class_name=session.class_type.name
+                class_name=class_type_name(session.class_type_id),
+                commit=False
             )
 
             # Notify trainer of new booking
             notify_new_booking(
                 trainer_id=session.trainer_id,
-                member_username=User.query.get(user_id).username,
+                member_username=member_name,
                 session_date=session.date,
-                class_name=session.class_type.name
+                class_name=class_type_name(session.class_type_id),
+                commit=False
             )
             
             created_bookings.append({
                 'booking_id': booking.id,
                 'session_id': session.id,
-                'class_type': session.class_type.name,
+                'class_type': class_type_name(session.class_type_id),
                 'date': session.date.isoformat(),
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
@@ -285,27 +363,30 @@ def process_checkout():
             notify_order_placed(
                 user_id=user_id,
                 order_id=order.id,
-                total_price=order.total_price
+                total_price=order.total_price,
+                commit=False
             )
-        
-        # Commit transaction
+    
+    # Commit transaction; read what the response needs first, as commit expires it
+    seats = [session_seats(session) for booking, session in new_bookings]
+    order_id = order.id if order else None
+    with timed_stage('checkout.process', 'commit'):
         db.session.commit()
-        
-        return jsonify({
-            'message': 'Checkout successful!',
-            'payment_status': 'completed',
-            'total_amount': total_amount,
-            'order': {
-                'order_id': order.id if order else None,
-                'products_count': len(order_items)
-            } if order else None,
-            'bookings': created_bookings,
-            'bookings_count': len(created_bookings)
-        }), 200
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Checkout failed: {str(e)}'}), 500
+    
+    for entry in seats:
+        availability_cache.put(*entry)
+    
+    return jsonify({
+        'message': 'Checkout successful!',
+        'payment_status': 'completed',
+        'total_amount': total_amount,
+        'order': {
+            'order_id': order_id,
+            'products_count': len(order_items)
+        } if order else None,
+        'bookings': created_bookings,
+        'bookings_count': len(created_bookings)
+    }), 200
 
 
 def simulate_payment(payment_method, card_details, amount):
@@ -402,7 +483,7 @@ def get_booking_history():
                 booking_list.append({
                     'booking_id': booking.id,
                     'session_id': session.id,
-                    'class_type': session.class_type.name,
+                    'class_type': class_type_name(session.class_type_id),
                     'trainer_name': f"{session.trainer.first_name} {session.trainer.last_name}",
                     'date': session.date.isoformat(),
                     'start_time': session.start_time.strftime('%H:%M'),
@@ -458,21 +539,26 @@ def cancel_booking(booking_id):
         notify_booking_cancelled(
             user_id=user_id,
             session_date=session.date.isoformat(),
-            class_name=session.class_type.name
+            class_name=class_type_name(session.class_type_id),
+            commit=False
         )
 
         notify_session_cancelled_by_member(
             trainer_id=session.trainer_id,
-            class_name=session.class_type.name,
-            session_date=session.date.isoformat()
+            class_name=class_type_name(session.class_type_id),
+            session_date=session.date.isoformat(),
+            commit=False
         )
         
+        seats = session_seats(session)
+        refund_amount = session.price
         db.session.commit()
+        availability_cache.put(*seats)
         
         return jsonify({
             'message': 'Booking cancelled successfully',
-            'booking_id': booking.id,
-            'refund_amount': session.price 
+            'booking_id': booking_id,
+            'refund_amount': refund_amount
         }), 200
         
     except Exception as e:
@@ -2,53 +2,17 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Membership
 from datetime import datetime, timedelta
+from reference_data import MEMBERSHIP_PLANS, get_reference_data
 
 membership_bp = Blueprint('membership', __name__, url_prefix='/api/membership')
 
-# Membership plans configuration
-MEMBERSHIP_PLANS = {
-    'Monthly': {
-        'price': 50.0,
-        'duration_days': 30,
-        'description': 'Access to all gym facilities for 30 days'
-    },
-    'Quarterly': {
-        'price': 135.0,  # 10% discount
-        'duration_days': 90,
-        'description': 'Access to all gym facilities for 90 days'
-    },
-    'Yearly': {
-        'price': 480.0,  # 20% discount
-        'duration_days': 365,
-        'description': 'Access to all gym facilities for 1 year'
-    },
-    'Premium': {
-        'price': 100.0,
-        'duration_days': 30,
-        'description': 'Premium access with personal training sessions included'
-    },
-    'Student': {
-        'price': 35.0,
-        'duration_days': 30,
-        'description': 'Student discount membership (ID verification required)'
-    }
-}
-
-
 # ==================== MEMBER ENDPOINTS ====================
 
 @membership_bp.route('/plans', methods=['GET'])
 def get_membership_plans():
     """Get all available membership plans"""
     try:
-        plans = []
-        for plan_type, details in MEMBERSHIP_PLANS.items():
-            plans.append({
-                'type': plan_type,
-                'price': details['price'],
-                'duration_days': details['duration_days'],
-                'description': details['description']
-            })
+        plans = get_reference_data().membership_plans
         
         return jsonify({
             'plans': plans,
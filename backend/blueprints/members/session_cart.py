@@ -1,10 +1,50 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, TrainerSession, SessionCart, SessionCartItem
+from models import db, User, TrainerSession, SessionCart, SessionCartItem, Booking
 from datetime import datetime, date
+from sqlalchemy import and_, or_, func, exists, tuple_
+import base64
+import binascii
+from scheduling import find_member_conflicts, describe_conflict, bookable_session
+from availability import availability_cache
+from reference_data import class_type_name
 
 session_cart_bp = Blueprint('session_cart', __name__, url_prefix='/api/session-cart')
 
+MAX_BATCH_SESSIONS = 50
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_AVAILABILITY_IDS = 200
+
+
+def encode_cursor(row):
+    """Opaque pagination cursor for the (date, start_time, id) of a session row"""
+    raw = f"{row.date.isoformat()}|{row.start_time.strftime('%H:%M:%S')}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor - raises ValueError for malformed cursors"""
+    try:
+        day, start, session_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return (
+            datetime.strptime(day, '%Y-%m-%d').date(),
+            datetime.strptime(start, '%H:%M:%S').time(),
+            int(session_id)
+        )
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def conflict_error(session_id, conflicts):
+    """Error message for the first conflict of a session that cannot be added"""
+    for conflict in conflicts:
+        if conflict['session_id'] == session_id and conflict['source'] == 'cart':
+            return 'This session is already in your cart'
+        if conflict['session_id'] == session_id and conflict['source'] == 'booking':
+            return 'You have already booked this session'
+    return describe_conflict(conflicts[0])
+
 # ==================== SESSION CART MANAGEMENT ====================
 
 @session_cart_bp.route('/', methods=['GET'])
@@ -19,7 +59,7 @@ def get_session_cart():
         if not user or user.role != 'Member':
             return jsonify({'error': 'Unauthorized - Members only'}), 403
         
-        # Get or create session cart for user
+        # Get session cart for user
         cart = SessionCart.query.filter_by(user_id=user_id).first()
         
         if not cart:
@@ -30,47 +70,56 @@ def get_session_cart():
                 'total_price': 0
             }), 200
         
-        # Get cart items with session details
-        cart_items = SessionCartItem.query.filter_by(cart_id=cart.id).all()
-        
-        items = []
-        total_price = 0
-        
-        for item in cart_items:
-            session = item.session
-            if session and session.is_active:
-                # Check if session is still available and not in the past
-                session_datetime = datetime.combine(session.date, session.start_time)
-                if session_datetime > datetime.now() and not session.is_full:
-                    items.append({
-                        'cart_item_id': item.id,
-                        'session_id': session.id,
-                        'class_type': session.class_type.name,
-                        'trainer_name': f"{session.trainer.first_name} {session.trainer.last_name}",
-                        'date': session.date.isoformat(),
-                        'start_time': session.start_time.strftime('%H:%M'),
-                        'end_time': session.end_time.strftime('%H:%M'),
-                        'price': session.price,
-                        'spots_remaining': session.spots_remaining,
-                        'added_at': item.created_at.isoformat() if item.created_at else None
-                    })
-                    total_price += session.price
-                else:
-                    # Remove invalid items (past sessions or full sessions)
-                    db.session.delete(item)
-        
-        db.session.commit()
-        
-        return jsonify({
+        # Only bookable items are listed - past, full and inactive sessions are
+        # filtered here and removed from the table by the cart sweeper job
+        rows = db.session.query(
+            SessionCartItem.id.label('cart_item_id'),
+            SessionCartItem.created_at.label('added_at'),
+            TrainerSession.id.label('session_id'),
+            TrainerSession.date,
+            TrainerSession.start_time,
+            TrainerSession.end_time,
+            TrainerSession.price,
+            TrainerSession.max_members,
+            TrainerSession.current_bookings,
+            TrainerSession.class_type_id,
+            User.first_name,
+            User.last_name
+        ).join(
+            TrainerSession, SessionCartItem.session_id == TrainerSession.id
+        ).join(
+            User, TrainerSession.trainer_id == User.user_id
+        ).filter(
+            SessionCartItem.cart_id == cart.id,
+            bookable_session()
+        ).order_by(SessionCartItem.id).all()
+        
+        items = [{
+            'cart_item_id': row.cart_item_id,
+            'session_id': row.session_id,
+            'class_type': class_type_name(row.class_type_id),
+            'trainer_name': f"{row.first_name} {row.last_name}",
+            'date': row.date.isoformat(),
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M'),
+            'price': row.price,
+            'spots_remaining': row.max_members - row.current_bookings,
+            'added_at': row.added_at.isoformat() if row.added_at else None
+        } for row in rows]
+        
+        response = jsonify({
             'cart_id': cart.id,
             'items': items,
             'total_items': len(items),
-            'total_price': total_price,
+            'total_price': sum(item['price'] for item in items),
             'created_at': cart.created_at.isoformat() if cart.created_at else None
-        }), 200
+        })
+        
+        # Read-only, so clients can revalidate with If-None-Match and get a 304
+        response.add_etag()
+        return response.make_conditional(request)
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': f'Failed to fetch session cart: {str(e)}'}), 500
 
 
@@ -113,44 +162,17 @@ def add_to_session_cart():
         if session.is_full:
             return jsonify({'error': 'This session is already full'}), 400
         
+        # One query checks the cart, confirmed bookings and time overlaps
+        conflicts = find_member_conflicts(user_id, [session])[session.id]
+        if conflicts:
+            return jsonify({'error': conflict_error(session.id, conflicts)}), 409
+        
         # Get or create session cart
         cart = SessionCart.query.filter_by(user_id=user_id).first()
         if not cart:
             cart = SessionCart(user_id=user_id)
             db.session.add(cart)
-            db.session.commit()
-        
-        # Check if session already in cart
-        existing_item = SessionCartItem.query.filter_by(
-            cart_id=cart.id,
-            session_id=session_id
-        ).first()
-        
-        if existing_item:
-            return jsonify({'error': 'This session is already in your cart'}), 409
-        
-        # Check if user already has a booking for this session
-        from models import Booking
-        existing_booking = Booking.query.filter_by(
-            member_id=user_id,
-            session_id=session_id,
-            status='confirmed'
-        ).first()
-        
-        if existing_booking:
-            return jsonify({'error': 'You have already booked this session'}), 409
-        
-        # Check for time conflicts with other sessions in cart
-        cart_items = SessionCartItem.query.filter_by(cart_id=cart.id).all()
-        for item in cart_items:
-            other_session = item.session
-            if other_session.date == session.date:
-                # Check for time overlap
-                if not (session.end_time <= other_session.start_time or 
-                       session.start_time >= other_session.end_time):
-                    return jsonify({
-                        'error': f'Time conflict: You already have a "{other_session.class_type.name}" session in your cart from {other_session.start_time.strftime("%H:%M")} to {other_session.end_time.strftime("%H:%M")} on this date'
-                    }), 409
+            db.session.flush()
         
         # Create new cart item
         cart_item = SessionCartItem(
@@ -158,6 +180,7 @@ def add_to_session_cart():
             session_id=session_id
         )
         db.session.add(cart_item)
+        cart.updated_at = func.now()
         db.session.commit()
         
         return jsonify({
@@ -165,7 +188,7 @@ def add_to_session_cart():
             'cart_item': {
                 'cart_item_id': cart_item.id,
                 'session_id': session.id,
-                'class_type': session.class_type.name,
+                'class_type': class_type_name(session.class_type_id),
                 'date': session.date.isoformat(),
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
@@ -178,6 +201,104 @@ def add_to_session_cart():
         return jsonify({'error': f'Failed to add session to cart: {str(e)}'}), 500
 
 
+@session_cart_bp.route('/add-batch', methods=['POST'])
+@jwt_required()
+def add_many_to_session_cart():
+    """
+    Add several sessions to cart at once, reporting every conflict
+    Body: {
+        "session_ids": [1, 2, 3]
+    }
+    Sessions that can be booked are added; the others are listed in
+    "rejected" with the reason and any conflicting cart items/bookings.
+    """
+    try:
+        user_id = get_jwt_identity()
+        
+        # Verify user is a member
+        user = User.query.get(user_id)
+        if not user or user.role != 'Member':
+            return jsonify({'error': 'Unauthorized - Members only'}), 403
+        
+        data = request.get_json() or {}
+        
+        session_ids = data.get('session_ids')
+        if not isinstance(session_ids, list) or not session_ids:
+            return jsonify({'error': 'session_ids must be a non-empty list'}), 400
+        
+        if len(session_ids) > MAX_BATCH_SESSIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_SESSIONS} sessions per request'}), 400
+        
+        session_ids = list(dict.fromkeys(session_ids))  # drop duplicates, keep order
+        
+        sessions = {s.id: s for s in TrainerSession.query.filter(
+            TrainerSession.id.in_(session_ids),
+            TrainerSession.is_active == True
+        ).all()}
+        
+        now = datetime.now()
+        rejected = []
+        candidates = []
+        
+        for session_id in session_ids:
+            session = sessions.get(session_id)
+            if not session:
+                rejected.append({'session_id': session_id, 'error': 'Session not found or unavailable'})
+            elif datetime.combine(session.date, session.start_time) <= now:
+                rejected.append({'session_id': session_id, 'error': 'Cannot book a session in the past'})
+            elif session.is_full:
+                rejected.append({'session_id': session_id, 'error': 'This session is already full'})
+            else:
+                candidates.append(session)
+        
+        conflicts = find_member_conflicts(user_id, candidates)
+        to_add = []
+        
+        for session in candidates:
+            if conflicts[session.id]:
+                rejected.append({
+                    'session_id': session.id,
+                    'error': conflict_error(session.id, conflicts[session.id]),
+                    'conflicts': conflicts[session.id]
+                })
+            else:
+                to_add.append(session)
+        
+        added = []
+        if to_add:
+            # Get or create session cart
+            cart = SessionCart.query.filter_by(user_id=user_id).first()
+            if not cart:
+                cart = SessionCart(user_id=user_id)
+                db.session.add(cart)
+                db.session.flush()
+            
+            cart_items = [SessionCartItem(cart_id=cart.id, session_id=s.id) for s in to_add]
+            db.session.add_all(cart_items)
+            cart.updated_at = func.now()
+            db.session.commit()
+            
+            added = [{
+                'cart_item_id': item.id,
+                'session_id': session.id,
+                'class_type': class_type_name(session.class_type_id),
+                'date': session.date.isoformat(),
+                'start_time': session.start_time.strftime('%H:%M'),
+                'end_time': session.end_time.strftime('%H:%M'),
+                'price': session.price
+            } for item, session in zip(cart_items, to_add)]
+        
+        return jsonify({
+            'message': f'{len(added)} session(s) added to cart',
+            'added': added,
+            'rejected': rejected
+        }), 201 if added else 409
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to add sessions to cart: {str(e)}'}), 500
+
+
 @session_cart_bp.route('/remove/<int:cart_item_id>', methods=['DELETE'])
 @jwt_required()
 def remove_from_session_cart(cart_item_id):
@@ -197,6 +318,7 @@ def remove_from_session_cart(cart_item_id):
         
         # Remove item
         db.session.delete(cart_item)
+        cart.updated_at = func.now()
         db.session.commit()
         
         return jsonify({'message': 'Session removed from cart successfully'}), 200
@@ -235,19 +357,51 @@ def clear_session_cart():
 @jwt_required()
 def get_available_sessions():
     """
-    Get all available sessions for booking
+    Get available sessions for booking, one page at a time
     Query params:
         - class_type_id: Filter by class type
         - date_from: Filter sessions from this date (YYYY-MM-DD)
         - date_to: Filter sessions until this date (YYYY-MM-DD)
+        - limit: Page size (default 50, max 100)
+        - cursor: next_cursor from the previous page
+    Full sessions and sessions the member already booked or has in their
+    cart are excluded in SQL. Pages are ordered by (date, start_time, id).
     """
     try:
         user_id = get_jwt_identity()
         
-        # Base query - only active sessions in the future that aren't full
-        query = TrainerSession.query.filter(
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+        
+        already_booked = exists().where(
+            Booking.session_id == TrainerSession.id,
+            Booking.member_id == user_id,
+            Booking.status == 'confirmed'
+        )
+        
+        already_in_cart = exists().where(
+            SessionCartItem.session_id == TrainerSession.id,
+            SessionCartItem.cart_id == SessionCart.id,
+            SessionCart.user_id == user_id
+        )
+        
+        # Base query - only active sessions in the future with free spots
+        query = db.session.query(
+            TrainerSession.id,
+            TrainerSession.class_type_id,
+            TrainerSession.date,
+            TrainerSession.start_time,
+            TrainerSession.end_time,
+            TrainerSession.price,
+            User.first_name,
+            User.last_name
+        ).join(
+            User, TrainerSession.trainer_id == User.user_id
+        ).filter(
             TrainerSession.is_active == True,
-            TrainerSession.date >= date.today()
+            TrainerSession.date >= date.today(),
+            TrainerSession.current_bookings < TrainerSession.max_members,
+            ~already_booked,
+            ~already_in_cart
         )
         
         # Apply filters
@@ -271,54 +425,80 @@ def get_available_sessions():
             except ValueError:
                 return jsonify({'error': 'Invalid date_to format. Use YYYY-MM-DD'}), 400
         
-        # Order by date and time
-        sessions = query.order_by(
-            TrainerSession.date.asc(),
-            TrainerSession.start_time.asc()
-        ).all()
-        
-        # Get user's existing bookings and cart items
-        from models import Booking
-        user_bookings = {b.session_id for b in Booking.query.filter_by(
-            member_id=user_id,
-            status='confirmed'
-        ).all()}
+        # Keyset pagination - continue after the last row of the previous page
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(
+                tuple_(TrainerSession.date, TrainerSession.start_time, TrainerSession.id) > after
+            )
         
-        cart = SessionCart.query.filter_by(user_id=user_id).first()
-        cart_session_ids = set()
-        if cart:
-            cart_session_ids = {item.session_id for item in SessionCartItem.query.filter_by(
-                cart_id=cart.id
-            ).all()}
-        
-        available_sessions = []
-        for session in sessions:
-            # Skip if user already booked or in cart
-            if session.id in user_bookings or session.id in cart_session_ids:
-                continue
-            
-            # Skip if full
-            if session.is_full:
-                continue
-            
-            available_sessions.append({
-                'id': session.id,
-                'class_type': session.class_type.name,
-                'class_type_id': session.class_type_id,
-                'trainer_name': f"{session.trainer.first_name} {session.trainer.last_name}",
-                'date': session.date.isoformat(),
-                'start_time': session.start_time.strftime('%H:%M'),
-                'end_time': session.end_time.strftime('%H:%M'),
-                'price': session.price,
-                'max_members': session.max_members,
-                'spots_remaining': session.spots_remaining,
-                'is_full': session.is_full
-            })
+        # Order by date and time; one extra row tells us whether there is another page
+        rows = query.order_by(
+            TrainerSession.date.asc(),
+            TrainerSession.start_time.asc(),
+            TrainerSession.id.asc()
+        ).limit(limit + 1).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        # Seat counts come from the availability cache (misses are loaded in one query)
+        availability = availability_cache.get_many([row.id for row in rows])
+        
+        available_sessions = [{
+            'id': row.id,
+            'class_type': class_type_name(row.class_type_id),
+            'class_type_id': row.class_type_id,
+            'trainer_name': f"{row.first_name} {row.last_name}",
+            'date': row.date.isoformat(),
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M'),
+            'price': row.price,
+            'max_members': availability[row.id]['max_members'],
+            'spots_remaining': availability[row.id]['spots_remaining'],
+            'is_full': availability[row.id]['is_full']
+        } for row in rows if row.id in availability]
         
         return jsonify({
             'sessions': available_sessions,
-            'total': len(available_sessions)
+            'total': len(available_sessions),
+            'has_more': has_more,
+            'next_cursor': encode_cursor(rows[-1]) if has_more else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch available sessions: {str(e)}'}), 500
+
+
+@session_cart_bp.route('/availability', methods=['GET'])
+@jwt_required()
+def get_sessions_availability():
+    """
+    Live seat counts for sessions already on screen, served from the availability cache
+    Query params:
+        - ids: Comma separated session ids (max 200)
+    """
+    try:
+        try:
+            session_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma separated list of session ids'}), 400
+        
+        if not session_ids:
+            return jsonify({'error': 'ids is required'}), 400
+        
+        if len(session_ids) > MAX_AVAILABILITY_IDS:
+            return jsonify({'error': f'At most {MAX_AVAILABILITY_IDS} ids per request'}), 400
+        
+        availability = availability_cache.get_many(session_ids)
+        
+        return jsonify({
+            'availability': {str(session_id): seats for session_id, seats in availability.items()}
         }), 200
         
     except Exception as e:
-        return jsonify({'error': f'Failed to fetch available sessions: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to fetch availability: {str(e)}'}), 500
@@ -3,6 +3,10 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from models import db, Products, ProductCategory, Equipments, EqipmentCategory, Cart, CartItem, User
 from sqlalchemy import func
+from reference_data import (
+    get_reference_data, product_category, equipment_category,
+    product_category_name, equipment_category_name
+)
 
 shop_bp = Blueprint('shop', __name__, url_prefix='/api/shop')
 
@@ -66,7 +70,7 @@ def get_products():
             'price': p.price,
             'images': p.images,
             'category_id': p.product_category_id,
-            'category_name': p.category.name if p.category else None,
+            'category_name': product_category_name(p.product_category_id),
             'created_at': p.created_at.isoformat() if p.created_at else None
         } for p in pagination.items]
         
@@ -91,6 +95,8 @@ def get_product_detail(product_id):
         if not product:
             return jsonify({'error': 'Product not found'}), 404
         
+        category = product_category(product.product_category_id)
+        
         return jsonify({
             'id': product.id,
             'name': product.name,
@@ -99,8 +105,8 @@ def get_product_detail(product_id):
             'price': product.price,
             'images': product.images,
             'category_id': product.product_category_id,
-            'category_name': product.category.name if product.category else None,
-            'category_slug': product.category.slug if product.category else None,
+            'category_name': category['name'] if category else None,
+            'category_slug': category['slug'] if category else None,
             'created_at': product.created_at.isoformat() if product.created_at else None,
             'updated_at': product.updated_at.isoformat() if product.updated_at else None
         }), 200
@@ -113,14 +119,17 @@ def get_product_detail(product_id):
 def get_product_categories():
     """Get all product categories"""
     try:
-        categories = ProductCategory.query.all()
+        categories = get_reference_data().product_categories.values()
+        
+        # One grouped count instead of loading every category's products
+        counts = dict(db.session.query(
+            Products.product_category_id, func.count(Products.id)
+        ).group_by(Products.product_category_id).all())
         
         return jsonify({
             'categories': [{
-                'id': c.id,
-                'name': c.name,
-                'slug': c.slug,
-                'product_count': len(c.products)
+                **c,
+                'product_count': counts.get(c['id'], 0)
             } for c in categories]
         }), 200
         
@@ -171,7 +180,7 @@ def get_equipments():
             'description': e.description,
             'images': e.images,
             'category_id': e.equipment_category_id,
-            'category_name': e.category.name if e.category else None,
+            'category_name': equipment_category_name(e.equipment_category_id),
             'created_at': e.created_at.isoformat() if e.created_at else None
         } for e in pagination.items]
         
@@ -196,14 +205,16 @@ def get_equipment_detail(equipment_id):
         if not equipment:
             return jsonify({'error': 'Equipment not found'}), 404
         
+        category = equipment_category(equipment.equipment_category_id)
+        
         return jsonify({
             'id': equipment.id,
             'name': equipment.name,
             'description': equipment.description,
             'images': equipment.images,
             'category_id': equipment.equipment_category_id,
-            'category_name': equipment.category.name if equipment.category else None,
-            'category_slug': equipment.category.slug if equipment.category else None,
+            'category_name': category['name'] if category else None,
+            'category_slug': category['slug'] if category else None,
             'created_at': equipment.created_at.isoformat() if equipment.created_at else None,
             'updated_at': equipment.updated_at.isoformat() if equipment.updated_at else None
         }), 200
@@ -216,14 +227,17 @@ def get_equipment_detail(equipment_id):
 def get_equipment_categories():
     """Get all equipment categories"""
     try:
-        categories = EqipmentCategory.query.all()
+        categories = get_reference_data().equipment_categories.values()
+        
+        # One grouped count instead of loading every category's equipment
+        counts = dict(db.session.query(
+            Equipments.equipment_category_id, func.count(Equipments.id)
+        ).group_by(Equipments.equipment_category_id).all())
         
         return jsonify({
             'categories': [{
-                'id': c.id,
-                'name': c.name,
-                'slug': c.slug,
-                'equipment_count': len(c.equipments)
+                **c,
+                'equipment_count': counts.get(c['id'], 0)
             } for c in categories]
         }), 200
         
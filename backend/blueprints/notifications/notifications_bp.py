@@ -1,12 +1,17 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+import json
+import queue
+import time
 from models import db, Notification
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from Notifications import (
     get_user_notifications,
     mark_as_read,
     mark_all_as_read,
-    get_unread_count
+    get_unread_count,
+    delete_notification as remove_notification
 )
+import notification_stream
 
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
@@ -64,6 +69,67 @@ def unread_count():
         }), 500
 
 
+@notifications_bp.route('/stream', methods=['GET'])
+@jwt_required(locations=['query_string'])  # EventSource cannot send headers; only this route takes ?jwt=
+def stream_notifications():
+    """
+    Server-Sent Events stream of the current user's notifications
+    Query params:
+        - jwt: Access token (EventSource cannot send an Authorization header)
+    Events:
+        - notification: A new notification, same fields as GET /
+        - unread_count: {"count": n}, sent on connect and after every change
+    A comment line is sent every NOTIFICATION_STREAM_HEARTBEAT_SECONDS; the
+    stream ends after NOTIFICATION_STREAM_MAX_SECONDS and the browser reconnects.
+    """
+    current_user = get_jwt_identity()
+    heartbeat = current_app.config['NOTIFICATION_STREAM_HEARTBEAT_SECONDS']
+    max_seconds = current_app.config['NOTIFICATION_STREAM_MAX_SECONDS']
+    notification_stream.ensure_listener()
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def unread_count_event():
+        count = get_unread_count(current_user)
+        # Do not hold a pooled connection while the stream waits
+        db.session.close()
+        return sse('unread_count', {'count': count})
+
+    def generate():
+        subscriber = notification_stream.broker.subscribe(current_user)
+        try:
+            yield 'retry: 5000\n\n'
+            yield unread_count_event()
+
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                try:
+                    events = [subscriber.get(timeout=heartbeat)]
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+
+                # Coalesce a burst into one unread count
+                while True:
+                    try:
+                        events.append(subscriber.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for event in events:
+                    if event['type'] == 'notification':
+                        yield sse('notification', event['notification'])
+                yield unread_count_event()
+        finally:
+            notification_stream.broker.unsubscribe(current_user, subscriber)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @notifications_bp.route('/<int:notification_id>/read', methods=['PUT'])
 @jwt_required()
 def mark_notification_read(notification_id):
@@ -145,8 +211,11 @@ def delete_notification(notification_id):
                 'message': 'Unauthorized'
             }), 403
         
-        db.session.delete(notification)
-        db.session.commit()
+        if not remove_notification(notification_id):
+            return jsonify({
+                'success': False,
+                'message': 'Notification not found'
+            }), 404
         
         return jsonify({
             'success': True,
@@ -1,11 +1,50 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, time, date
+from datetime import datetime, time, date, timedelta
+import hashlib
+import csv
+import io
 from models import db, User, TrainerSession, ClassType, Booking
-from sqlalchemy import and_, or_
+from sqlalchemy import insert, update, select, case, func
+from sqlalchemy.exc import IntegrityError
+from availability import availability_cache, session_seats
+from cancellations import cancel_session_bookings
+import reference_data
+from reference_data import get_reference_data, class_type_name
+from scheduling import (
+    load_trainer_schedule, weekly_occurrences, find_trainer_overlap,
+    trainer_overlap_message, overlap_enforced_by_database, is_overlap_violation
+)
 
 session_bp = Blueprint('sessions', __name__, url_prefix='/api/sessions')
 
+MAX_SERIES_OCCURRENCES = 100
+MAX_SERIES_DAYS = 366
+MAX_CALENDAR_DAYS = 92
+MAX_ATTENDANCE_BATCH = 500
+
+# Booking statuses that make up a session's roster (everyone holding a seat)
+ROSTER_STATUSES = ('confirmed', 'completed', 'no_show')
+
+
+def roster_query(session_id, statuses=ROSTER_STATUSES):
+    """Bookings of a session joined with their members, in booking order"""
+    return select(
+        Booking.id,
+        Booking.status,
+        Booking.created_at,
+        User.user_id,
+        User.first_name,
+        User.last_name,
+        User.email,
+        User.phone
+    ).join(
+        User, Booking.member_id == User.user_id
+    ).where(
+        Booking.session_id == session_id,
+        Booking.status.in_(statuses)
+    ).order_by(Booking.created_at, Booking.id)
+
 # ==================== SESSION MANAGEMENT ====================
 
 @session_bp.route('/', methods=['GET'])
@@ -28,7 +67,7 @@ def get_my_sessions():
         return jsonify({
             'sessions': [{
                 'id': s.id,
-                'class_type': s.class_type.name,
+                'class_type': class_type_name(s.class_type_id),
                 'class_type_id': s.class_type_id,
                 'date': s.date.isoformat(),
                 'start_time': s.start_time.strftime('%H:%M'),
@@ -46,6 +85,100 @@ def get_my_sessions():
         return jsonify({'error': f'Failed to fetch sessions: {str(e)}'}), 500
 
 
+@session_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+def get_calendar_sessions():
+    """
+    Get the logged-in trainer's active sessions in a date range (e.g. the visible week or month)
+    Query params:
+        - from: First date, YYYY-MM-DD (default: today)
+        - to: Last date, YYYY-MM-DD, inclusive (default: from + 6 days, max 92 days)
+    Responses carry an ETag; send it back in If-None-Match to get a 304 when nothing changed.
+    """
+    try:
+        trainer_id = get_jwt_identity()
+        
+        # Verify user is a trainer
+        user = User.query.get(trainer_id)
+        if not user or user.role != 'Trainer':
+            return jsonify({'error': 'Unauthorized - Trainers only'}), 403
+        
+        try:
+            date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else date.today()
+            date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else date_from + timedelta(days=6)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+        
+        if date_from > date_to:
+            return jsonify({'error': 'from must not be after to'}), 400
+        
+        if (date_to - date_from).days >= MAX_CALENDAR_DAYS:
+            return jsonify({'error': f'Date range can span at most {MAX_CALENDAR_DAYS} days'}), 400
+        
+        in_range = (
+            TrainerSession.trainer_id == trainer_id,
+            TrainerSession.date.between(date_from, date_to)
+        )
+        
+        # Cheap aggregate first: any insert, edit or deactivation in the range changes it.
+        # Inactive sessions are counted too so a deactivation is not masked by a new session.
+        marker = TrainerSession.query.with_entities(
+            func.count(TrainerSession.id),
+            func.max(TrainerSession.created_at),
+            func.max(TrainerSession.updated_at)
+        ).filter(*in_range).one()
+        
+        # The reference data version covers class type renames, which show up in the payload
+        etag = hashlib.md5(
+            f'{trainer_id}|{date_from}|{date_to}|{marker[0]}|{marker[1]}|{marker[2]}|'
+            f'{get_reference_data().version}'.encode()
+        ).hexdigest()
+        
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        rows = TrainerSession.query.with_entities(
+            TrainerSession.id,
+            TrainerSession.class_type_id,
+            TrainerSession.date,
+            TrainerSession.start_time,
+            TrainerSession.end_time,
+            TrainerSession.price,
+            TrainerSession.max_members,
+            TrainerSession.current_bookings,
+            TrainerSession.created_at
+        ).filter(
+            *in_range,
+            TrainerSession.is_active == True
+        ).order_by(TrainerSession.date, TrainerSession.start_time).all()
+        
+        response = jsonify({
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'sessions': [{
+                'id': s.id,
+                'class_type': class_type_name(s.class_type_id),
+                'class_type_id': s.class_type_id,
+                'date': s.date.isoformat(),
+                'start_time': s.start_time.strftime('%H:%M'),
+                'end_time': s.end_time.strftime('%H:%M'),
+                'price': s.price,
+                'max_members': s.max_members,
+                'current_bookings': s.current_bookings,
+                'spots_remaining': s.max_members - s.current_bookings,
+                'is_full': s.current_bookings >= s.max_members,
+                'created_at': s.created_at.isoformat() if s.created_at else None
+            } for s in rows]
+        })
+        response.set_etag(etag)
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch calendar: {str(e)}'}), 500
+
+
 @session_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_session():
@@ -104,37 +237,12 @@ def create_session():
         if not class_type:
             return jsonify({'error': 'Class type not found'}), 404
         
-        # CRITICAL: Check for overlapping sessions with SAME class type
-        overlapping_session = TrainerSession.query.filter(
-            and_(
-                TrainerSession.trainer_id == trainer_id,
-                # REMOVED: TrainerSession.class_type_id == data['class_type_id'],
-                TrainerSession.date == session_date,
-                TrainerSession.is_active == True,
-                or_(
-                    # New session starts during existing session
-                    and_(
-                        TrainerSession.start_time <= start_time,
-                        TrainerSession.end_time > start_time
-                    ),
-                    # New session ends during existing session
-                    and_(
-                        TrainerSession.start_time < end_time,
-                        TrainerSession.end_time >= end_time
-                    ),
-                    # New session completely contains existing session
-                    and_(
-                        TrainerSession.start_time >= start_time,
-                        TrainerSession.end_time <= end_time
-                    )
-                )
-            )
-        ).first()
-
-        if overlapping_session:
-            return jsonify({
-                'error': f'You already have a "{overlapping_session.class_type.name}" session scheduled from {overlapping_session.start_time.strftime("%H:%M")} to {overlapping_session.end_time.strftime("%H:%M")} on this date. You cannot teach two classes at the same time.'
-            }), 409
+        # CRITICAL: A trainer cannot teach two classes at once. Postgres enforces
+        # this with an exclusion constraint at commit; elsewhere check up front.
+        if not overlap_enforced_by_database():
+            overlapping_session = find_trainer_overlap(trainer_id, session_date, start_time, end_time)
+            if overlapping_session:
+                return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
         
         # Create session
         new_session = TrainerSession(
@@ -148,7 +256,14 @@ def create_session():
         )
         
         db.session.add(new_session)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_overlap_violation(e):
+                raise
+            overlapping_session = find_trainer_overlap(trainer_id, session_date, start_time, end_time)
+            return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
         
         return jsonify({
             'message': 'Session created successfully',
@@ -168,6 +283,161 @@ def create_session():
         return jsonify({'error': f'Failed to create session: {str(e)}'}), 500
 
 
+@session_bp.route('/series', methods=['POST'])
+@jwt_required()
+def create_session_series():
+    """
+    Create a weekly recurring series of sessions
+    Body: {
+        "class_type_id": 1,
+        "start_date": "2024-12-01",
+        "end_date": "2025-02-28",  // at most 366 days after start_date
+        "weekdays": [0, 2],        // 0 = Monday ... 6 = Sunday
+        "every_weeks": 1,          // optional, 2 = every other week
+        "start_time": "17:00",
+        "end_time": "19:00",
+        "price": 25.00,
+        "max_members": 10
+    }
+    Occurrences that overlap one of the trainer's existing sessions are
+    skipped and listed in "conflicts"; the rest are created.
+    """
+    try:
+        trainer_id = get_jwt_identity()
+        
+        # Verify user is a trainer
+        user = User.query.get(trainer_id)
+        if not user or user.role != 'Trainer':
+            return jsonify({'error': 'Unauthorized - Trainers only'}), 403
+        
+        data = request.get_json() or {}
+        
+        # Validation
+        required_fields = ['class_type_id', 'start_date', 'end_date', 'weekdays', 'start_time', 'end_time', 'price', 'max_members']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        # Parse dates and times
+        try:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+            start_time = datetime.strptime(data['start_time'], '%H:%M').time()
+            end_time = datetime.strptime(data['end_time'], '%H:%M').time()
+        except ValueError:
+            return jsonify({'error': 'Invalid date or time format'}), 400
+        
+        # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+        weekdays = data['weekdays']
+        if (not isinstance(weekdays, list) or not weekdays
+                or not all(type(d) is int and 0 <= d <= 6 for d in weekdays)):
+            return jsonify({'error': 'weekdays must be a non-empty list of numbers from 0 (Monday) to 6 (Sunday)'}), 400
+        
+        every_weeks = data.get('every_weeks', 1)
+        if type(every_weeks) is not int or every_weeks < 1:
+            return jsonify({'error': 'every_weeks must be a positive number'}), 400
+        
+        # Validate time logic
+        if start_time >= end_time:
+            return jsonify({'error': 'End time must be after start time'}), 400
+        
+        if start_date > end_date:
+            return jsonify({'error': 'End date must not be before start date'}), 400
+        
+        # Bounds the day-by-day walk below, however sparse the weekdays/every_weeks pattern is
+        if (end_date - start_date).days >= MAX_SERIES_DAYS:
+            return jsonify({'error': f'A series can span at most {MAX_SERIES_DAYS} days'}), 400
+        
+        # Validate date is not in the past
+        if start_date < date.today():
+            return jsonify({'error': 'Cannot create session in the past'}), 400
+        
+        # Validate price and max_members
+        if data['price'] <= 0:
+            return jsonify({'error': 'Price must be greater than 0'}), 400
+        
+        if data['max_members'] <= 0:
+            return jsonify({'error': 'Max members must be greater than 0'}), 400
+        
+        # Check if class type exists
+        class_type = ClassType.query.get(data['class_type_id'])
+        if not class_type:
+            return jsonify({'error': 'Class type not found'}), 404
+        
+        occurrences = []
+        for day in weekly_occurrences(start_date, end_date, set(weekdays), every_weeks):
+            occurrences.append(day)
+            if len(occurrences) > MAX_SERIES_OCCURRENCES:
+                return jsonify({'error': f'A series can have at most {MAX_SERIES_OCCURRENCES} sessions'}), 400
+        
+        if not occurrences:
+            return jsonify({'error': 'No dates in the range fall on the selected weekdays'}), 400
+        
+        # One range fetch of the trainer's sessions, then check every occurrence in memory
+        schedule = load_trainer_schedule(trainer_id, occurrences[0], occurrences[-1])
+        
+        conflicts = []
+        rows = []
+        for day in occurrences:
+            overlapping = schedule.overlaps(day, start_time, end_time)
+            if overlapping:
+                existing = overlapping[0]
+                conflicts.append({
+                    'date': day.isoformat(),
+                    'error': f'You already have a "{existing["class_type"]}" session scheduled from {existing["start_time"]} to {existing["end_time"]} on this date. You cannot teach two classes at the same time.',
+                    'conflicting_session': existing
+                })
+            else:
+                rows.append({
+                    'trainer_id': trainer_id,
+                    'class_type_id': data['class_type_id'],
+                    'date': day,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'price': data['price'],
+                    'max_members': data['max_members']
+                })
+        
+        if not rows:
+            return jsonify({
+                'error': 'Every session in the series conflicts with your existing schedule',
+                'created': [],
+                'conflicts': conflicts
+            }), 409
+        
+        # Single multi-row INSERT for the whole series
+        try:
+            created = db.session.execute(
+                insert(TrainerSession).returning(TrainerSession.id, TrainerSession.date),
+                rows
+            ).all()
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_overlap_violation(e):
+                raise
+            # Another session was scheduled after the check above; the whole insert was rolled back
+            return jsonify({'error': 'Your schedule changed while creating the series. Please try again.'}), 409
+        
+        return jsonify({
+            'message': f'{len(created)} of {len(occurrences)} sessions created',
+            'created': [{
+                'id': row.id,
+                'class_type': class_type.name,
+                'date': row.date.isoformat(),
+                'start_time': start_time.strftime('%H:%M'),
+                'end_time': end_time.strftime('%H:%M'),
+                'price': data['price'],
+                'max_members': data['max_members']
+            } for row in sorted(created, key=lambda r: r.date)],
+            'conflicts': conflicts
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to create session series: {str(e)}'}), 500
+
+
 @session_bp.route('/<int:session_id>', methods=['PUT'])
 @jwt_required()
 def update_session(session_id):
@@ -232,42 +502,28 @@ def update_session(session_id):
             session.max_members = data['max_members']
         
         # Check for overlapping sessions (exclude current session)
-        overlapping_session = TrainerSession.query.filter(
-            and_(
-                TrainerSession.id != session_id,
-                TrainerSession.trainer_id == trainer_id,
-                # REMOVED: TrainerSession.class_type_id == session.class_type_id,
-                TrainerSession.date == session.date,
-                TrainerSession.is_active == True,
-                or_(
-                    and_(
-                        TrainerSession.start_time <= session.start_time,
-                        TrainerSession.end_time > session.start_time
-                    ),
-                    and_(
-                        TrainerSession.start_time < session.end_time,
-                        TrainerSession.end_time >= session.end_time
-                    ),
-                    and_(
-                        TrainerSession.start_time >= session.start_time,
-                        TrainerSession.end_time <= session.end_time
-                    )
-                )
-            )
-        ).first()
-
-        if overlapping_session:
-            return jsonify({
-                'error': f'You already have a "{overlapping_session.class_type.name}" session scheduled from {overlapping_session.start_time.strftime("%H:%M")} to {overlapping_session.end_time.strftime("%H:%M")} on this date. You cannot teach two classes at the same time.'
-            }), 409
+        session_date, start_time, end_time = session.date, session.start_time, session.end_time
+        if not overlap_enforced_by_database():
+            overlapping_session = find_trainer_overlap(trainer_id, session_date, start_time, end_time, exclude_id=session_id)
+            if overlapping_session:
+                return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
         
-        db.session.commit()
+        seats = session_seats(session)
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_overlap_violation(e):
+                raise
+            overlapping_session = find_trainer_overlap(trainer_id, session_date, start_time, end_time, exclude_id=session_id)
+            return jsonify({'error': trainer_overlap_message(overlapping_session)}), 409
+        availability_cache.put(*seats)
         
         return jsonify({
             'message': 'Session updated successfully',
             'session': {
                 'id': session.id,
-                'class_type': session.class_type.name,
+                'class_type': class_type_name(session.class_type_id),
                 'date': session.date.isoformat(),
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
@@ -302,7 +558,9 @@ def delete_session(session_id):
         
         # Soft delete
         session.is_active = False
+        seats = session_seats(session)
         db.session.commit()
+        availability_cache.put(*seats)
         
         return jsonify({'message': 'Session deleted successfully'}), 200
         
@@ -311,6 +569,44 @@ def delete_session(session_id):
         return jsonify({'error': f'Failed to delete session: {str(e)}'}), 500
 
 
+@session_bp.route('/<int:session_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_session(session_id):
+    """
+    Cancel an upcoming session: every confirmed booking is cancelled, its
+    member notified, and the session deactivated
+    """
+    try:
+        trainer_id = get_jwt_identity()
+        
+        session = TrainerSession.query.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Verify ownership
+        if session.trainer_id != trainer_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        if not session.is_active:
+            return jsonify({'error': 'Session is already cancelled'}), 400
+        
+        if datetime.combine(session.date, session.start_time) <= datetime.now():
+            return jsonify({'error': 'Cannot cancel a session that has already started'}), 400
+        
+        cancelled = cancel_session_bookings(session, 'the trainer')
+        db.session.commit()
+        availability_cache.invalidate([session_id])
+        
+        return jsonify({
+            'message': 'Session cancelled successfully',
+            'cancelled_bookings': cancelled
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to cancel session: {str(e)}'}), 500
+
+
 @session_bp.route('/<int:session_id>/bookings', methods=['GET'])
 @jwt_required()
 def get_session_bookings(session_id):
@@ -326,15 +622,12 @@ def get_session_bookings(session_id):
         if session.trainer_id != trainer_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        bookings = Booking.query.filter_by(
-            session_id=session_id,
-            status='confirmed'
-        ).all()
+        bookings = db.session.execute(roster_query(session_id, ('confirmed',))).all()
         
         return jsonify({
             'session': {
                 'id': session.id,
-                'class_type': session.class_type.name,
+                'class_type': class_type_name(session.class_type_id),
                 'date': session.date.isoformat(),
                 'start_time': session.start_time.strftime('%H:%M'),
                 'end_time': session.end_time.strftime('%H:%M'),
@@ -343,9 +636,9 @@ def get_session_bookings(session_id):
             },
             'bookings': [{
                 'id': b.id,
-                'member_id': b.member_id,
-                'member_name': f"{b.member.first_name} {b.member.last_name}",
-                'member_email': b.member.email,
+                'member_id': b.user_id,
+                'member_name': f"{b.first_name} {b.last_name}",
+                'member_email': b.email,
                 'booked_at': b.created_at.isoformat() if b.created_at else None
             } for b in bookings]
         }), 200
@@ -354,6 +647,162 @@ def get_session_bookings(session_id):
         return jsonify({'error': f'Failed to fetch bookings: {str(e)}'}), 500
 
 
+@session_bp.route('/<int:session_id>/roster', methods=['GET'])
+@jwt_required()
+def get_session_roster(session_id):
+    """
+    Get the roster (confirmed, completed and no-show bookings) of one of the trainer's sessions
+    Query params:
+        - format: json (default) or csv; csv is streamed row by row for large classes
+    """
+    try:
+        trainer_id = get_jwt_identity()
+        
+        session = TrainerSession.query.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Verify ownership
+        if session.trainer_id != trainer_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        output_format = request.args.get('format', 'json')
+        if output_format not in ('json', 'csv'):
+            return jsonify({'error': 'format must be json or csv'}), 400
+        
+        if output_format == 'csv':
+            query = roster_query(session_id).execution_options(yield_per=500)
+            
+            def generate():
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(['booking_id', 'status', 'first_name', 'last_name', 'email', 'phone', 'booked_at'])
+                for row in db.session.execute(query):
+                    writer.writerow([
+                        row.id,
+                        row.status,
+                        row.first_name,
+                        row.last_name,
+                        row.email,
+                        row.phone or '',
+                        row.created_at.isoformat() if row.created_at else ''
+                    ])
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+                yield buffer.getvalue()
+            
+            filename = f'roster-session-{session.id}-{session.date.isoformat()}.csv'
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/csv',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            )
+        
+        rows = db.session.execute(roster_query(session_id)).all()
+        
+        return jsonify({
+            'session': {
+                'id': session.id,
+                'class_type': class_type_name(session.class_type_id),
+                'date': session.date.isoformat(),
+                'start_time': session.start_time.strftime('%H:%M'),
+                'end_time': session.end_time.strftime('%H:%M'),
+                'current_bookings': session.current_bookings,
+                'max_members': session.max_members
+            },
+            'roster': [{
+                'booking_id': row.id,
+                'status': row.status,
+                'member': {
+                    'id': row.user_id,
+                    'name': f"{row.first_name} {row.last_name}",
+                    'email': row.email,
+                    'phone': row.phone
+                },
+                'booked_at': row.created_at.isoformat() if row.created_at else None
+            } for row in rows],
+            'total': len(rows)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch roster: {str(e)}'}), 500
+
+
+@session_bp.route('/<int:session_id>/attendance', methods=['PATCH'])
+@jwt_required()
+def mark_attendance(session_id):
+    """
+    Mark attendance for many bookings of one session in a single UPDATE
+    Body: {
+        "completed": [1, 2, 3],     // booking ids that attended
+        "no_show": [4]              // booking ids that did not show up
+    }
+    Bookings already marked can be corrected; cancelled bookings and ids
+    from other sessions are returned in "skipped".
+    """
+    try:
+        trainer_id = get_jwt_identity()
+        
+        session = TrainerSession.query.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Verify ownership
+        if session.trainer_id != trainer_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        if datetime.combine(session.date, session.start_time) > datetime.now():
+            return jsonify({'error': 'Attendance can only be marked once the session has started'}), 400
+        
+        data = request.get_json() or {}
+        completed = data.get('completed', [])
+        no_show = data.get('no_show', [])
+        
+        if not isinstance(completed, list) or not isinstance(no_show, list):
+            return jsonify({'error': 'completed and no_show must be lists of booking ids'}), 400
+        
+        # type() rather than isinstance(): JSON true/false arrive as bool, a subclass of int
+        if not all(type(i) is int for i in completed + no_show):
+            return jsonify({'error': 'completed and no_show must be lists of booking ids'}), 400
+        
+        if not completed and not no_show:
+            return jsonify({'error': 'No bookings to update'}), 400
+        
+        if set(completed) & set(no_show):
+            return jsonify({'error': 'A booking cannot be both completed and no_show'}), 400
+        
+        if len(completed) + len(no_show) > MAX_ATTENDANCE_BATCH:
+            return jsonify({'error': f'At most {MAX_ATTENDANCE_BATCH} bookings per request'}), 400
+        
+        requested = completed + no_show
+        
+        # Scoped to this session and to bookings holding a seat, so foreign or cancelled ids are untouched
+        updated = db.session.execute(
+            update(Booking).where(
+                Booking.session_id == session_id,
+                Booking.id.in_(requested),
+                Booking.status.in_(ROSTER_STATUSES)
+            ).values(
+                status=case((Booking.id.in_(completed), 'completed'), else_='no_show'),
+                updated_at=datetime.utcnow()
+            ).returning(Booking.id, Booking.status).execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+        
+        updated_ids = {row.id for row in updated}
+        
+        return jsonify({
+            'message': f'Attendance updated for {len(updated_ids)} booking(s)',
+            'updated': [{'booking_id': row.id, 'status': row.status} for row in updated],
+            'skipped': [booking_id for booking_id in requested if booking_id not in updated_ids]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update attendance: {str(e)}'}), 500
+
+
 # ==================== CLASS TYPES ====================
 
 @session_bp.route('/class-types', methods=['GET'])
@@ -361,15 +810,10 @@ def get_session_bookings(session_id):
 def get_class_types():
     """Get all available class types"""
     try:
-        class_types = ClassType.query.order_by(ClassType.name).all()
+        class_types = get_reference_data().class_types.values()
         
         return jsonify({
-            'class_types': [{
-                'id': ct.id,
-                'name': ct.name,
-                'description': ct.description,
-                'created_at': ct.created_at.isoformat() if ct.created_at else None
-            } for ct in class_types]
+            'class_types': list(class_types)
         }), 200
         
     except Exception as e:
@@ -413,6 +857,7 @@ def create_class_type():
         
         db.session.add(new_class_type)
         db.session.commit()
+        reference_data.refresh()
         
         return jsonify({
             'message': 'Class type created successfully',
@@ -474,6 +919,7 @@ def update_class_type(class_type_id):
             class_type.description = data['description'].strip()
         
         db.session.commit()
+        reference_data.refresh()
         
         return jsonify({
             'message': 'Class type updated successfully',
@@ -518,6 +964,7 @@ def delete_class_type(class_type_id):
         
         db.session.delete(class_type)
         db.session.commit()
+        reference_data.refresh()
         
         return jsonify({'message': 'Class type deleted successfully'}), 200
         
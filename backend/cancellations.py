@@ -0,0 +1,57 @@
+"""
+Session cancellation for the gym management system.
+Cancelling a session cancels every confirmed booking and notifies each
+member with set-based statements, so the cost does not grow with the
+number of ORM objects: one UPDATE ... RETURNING for the bookings, a
+multi-row INSERT for the notifications and one UPDATE for the session.
+
+The notifications and unread counters are built from the rows the
+booking UPDATE returned, so exactly the bookings that were cancelled are
+reported, even if another request confirms or cancels one meanwhile.
+"""
+from sqlalchemy import update
+from models import db, TrainerSession, Booking, dialect_greatest
+from Notifications import create_notifications_bulk
+
+
+def cancel_session_bookings(session, cancelled_by):
+    """
+    Cancel all confirmed bookings of a session, notify their members and
+    deactivate the session. The caller commits.
+
+    Args:
+        session (TrainerSession): The session being cancelled
+        cancelled_by (str): Who cancelled it, used in the message ('admin', 'the trainer')
+
+    Returns:
+        int: Number of bookings cancelled
+    """
+    message = (
+        f"Your booking for {session.date} at {session.start_time.strftime('%H:%M')} "
+        f"has been cancelled by {cancelled_by}."
+    )
+
+    cancelled = db.session.execute(
+        update(Booking).where(
+            Booking.session_id == session.id,
+            Booking.status == 'confirmed'
+        ).values(status='cancelled')
+        .returning(Booking.id, Booking.member_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    create_notifications_bulk(({
+        'user_id': row.member_id,
+        'message': message,
+        'link': f'/bookings/{row.id}'
+    } for row in cancelled), commit=False)
+
+    db.session.execute(
+        update(TrainerSession).where(TrainerSession.id == session.id).values(
+            is_active=False,
+            current_bookings=dialect_greatest(TrainerSession.current_bookings - len(cancelled), 0)
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.expire(session)
+
+    return len(cancelled)
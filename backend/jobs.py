@@ -0,0 +1,505 @@
+"""
+Background maintenance jobs for the gym management system.
+Every job works in bounded batches (one commit per batch) and records its
+progress in the metrics registry. Run them from cron through the Flask CLI:
+
+    flask --app app jobs sweep-carts
+    flask --app app jobs complete-bookings
+    flask --app app jobs reconcile-notification-counters
+    flask --app app jobs notification-retention --dry-run
+
+or set JOB_SCHEDULER_ENABLED to run them on a timer inside the app process.
+"""
+import threading
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, or_, select, update, insert, delete, func
+from models import (
+    db, Cart, CartItem, SessionCart, SessionCartItem, TrainerSession, Booking,
+    User, Notification, NotificationArchive, NotificationCounter, dialect_insert, dialect_days_ago
+)
+from Notifications import adjust_unread_counts
+from notification_stream import notify_changed
+from metrics import registry, timed_stage
+
+jobs_cli = AppGroup('jobs', help='Run background maintenance jobs.')
+
+# Jobs run by the in-process scheduler: name -> (function, config key with the interval in minutes)
+SCHEDULE = {}
+
+
+def scheduled(name, interval_key):
+    """Register a job with the in-process scheduler"""
+    def decorator(func):
+        SCHEDULE[name] = (func, interval_key)
+        return func
+    return decorator
+
+
+def delete_in_batches(id_query, delete_batch, batch_size, metric):
+    """
+    Repeatedly take up to batch_size ids from id_query and pass them to delete_batch.
+
+    Args:
+        id_query: SELECT of primary keys to delete (without a LIMIT)
+        delete_batch (callable): Deletes the rows for a list of ids
+        batch_size (int): Maximum rows per batch/commit
+        metric (str): Counter incremented with the number of rows deleted
+
+    Returns:
+        int: Total number of rows deleted
+    """
+    total = 0
+    while True:
+        ids = db.session.execute(id_query.limit(batch_size)).scalars().all()
+        if not ids:
+            break
+
+        delete_batch(ids)
+        db.session.commit()
+
+        total += len(ids)
+        registry.increment(metric, len(ids))
+
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+# ==================== CART SWEEPER ====================
+
+def sweep_session_cart_items(batch_size=None):
+    """Delete session cart items whose session has started, passed or been deactivated"""
+    batch_size = batch_size or current_app.config['JOB_BATCH_SIZE']
+    now = datetime.now()
+
+    expired_ids = select(SessionCartItem.id).join(
+        TrainerSession, SessionCartItem.session_id == TrainerSession.id
+    ).where(
+        or_(
+            TrainerSession.is_active == False,
+            TrainerSession.date < now.date(),
+            and_(
+                TrainerSession.date == now.date(),
+                TrainerSession.start_time <= now.time()
+            )
+        )
+    ).order_by(SessionCartItem.id)
+
+    return delete_in_batches(
+        expired_ids,
+        lambda ids: SessionCartItem.query.filter(SessionCartItem.id.in_(ids)).delete(synchronize_session=False),
+        batch_size,
+        'jobs.sweep_carts.session_cart_items_deleted'
+    )
+
+
+def sweep_idle_carts(cart_model, item_model, max_idle_days=None, batch_size=None):
+    """Delete carts (and their items) that have not been touched for max_idle_days"""
+    batch_size = batch_size or current_app.config['JOB_BATCH_SIZE']
+    max_idle_days = max_idle_days or current_app.config['CART_IDLE_DAYS']
+
+    # Timestamps come from the database's now(), so the cutoff does too
+    idle_ids = select(cart_model.id).where(
+        func.coalesce(cart_model.updated_at, cart_model.created_at) < dialect_days_ago(max_idle_days)
+    ).order_by(cart_model.id)
+
+    def delete_batch(ids):
+        item_model.query.filter(item_model.cart_id.in_(ids)).delete(synchronize_session=False)
+        cart_model.query.filter(cart_model.id.in_(ids)).delete(synchronize_session=False)
+
+    return delete_in_batches(
+        idle_ids,
+        delete_batch,
+        batch_size,
+        f'jobs.sweep_carts.{cart_model.__tablename__}_deleted'
+    )
+
+
+@scheduled('sweep_carts', 'CART_SWEEP_INTERVAL_MINUTES')
+def sweep_carts(max_idle_days=None, batch_size=None):
+    """
+    Remove expired session cart items and idle product/session carts.
+
+    Returns:
+        dict: Number of rows deleted per table
+    """
+    with timed_stage('jobs', 'sweep_carts'):
+        result = {
+            'session_cart_items': sweep_session_cart_items(batch_size),
+            'session_carts': sweep_idle_carts(SessionCart, SessionCartItem, max_idle_days, batch_size),
+            'carts': sweep_idle_carts(Cart, CartItem, max_idle_days, batch_size)
+        }
+    registry.increment('jobs.sweep_carts.runs')
+    return result
+
+
+@jobs_cli.command('sweep-carts')
+@click.option('--idle-days', type=int, default=None, help='Delete carts idle for longer than this (default CART_IDLE_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Rows per batch (default JOB_BATCH_SIZE).')
+def sweep_carts_command(idle_days, batch_size):
+    """Delete expired session cart items and idle carts."""
+    result = sweep_carts(idle_days, batch_size)
+    for table, deleted in result.items():
+        click.echo(f'{table}: {deleted} deleted')
+
+
+# ==================== BOOKING COMPLETION ====================
+
+@scheduled('complete_bookings', 'BOOKING_COMPLETION_INTERVAL_MINUTES')
+def complete_past_bookings(batch_size=None):
+    """
+    Mark confirmed bookings of active sessions that have ended as completed.
+
+    Each batch locks its rows with FOR UPDATE SKIP LOCKED (Postgres), so
+    several workers running the job at once take disjoint batches instead
+    of waiting on each other; the status check in the UPDATE keeps a batch
+    from completing a booking that was cancelled in the meantime.
+
+    Returns:
+        int: Number of bookings completed
+    """
+    batch_size = batch_size or current_app.config['JOB_BATCH_SIZE']
+    now = datetime.now()
+
+    ended_sessions = select(TrainerSession.id).where(
+        TrainerSession.is_active == True,
+        or_(
+            TrainerSession.date < now.date(),
+            and_(
+                TrainerSession.date == now.date(),
+                TrainerSession.end_time <= now.time()
+            )
+        )
+    )
+
+    # Served by ix_bookings_status_session
+    due_ids = select(Booking.id).where(
+        Booking.status == 'confirmed',
+        Booking.session_id.in_(ended_sessions)
+    ).order_by(Booking.id).limit(batch_size).with_for_update(skip_locked=True)
+
+    total = 0
+    with timed_stage('jobs', 'complete_bookings'):
+        while True:
+            ids = db.session.execute(due_ids).scalars().all()
+            if not ids:
+                break
+
+            completed = db.session.execute(
+                update(Booking).where(
+                    Booking.id.in_(ids),
+                    Booking.status == 'confirmed'
+                ).values(status='completed', updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+
+            total += completed
+            registry.increment('jobs.complete_bookings.completed', completed)
+
+            if len(ids) < batch_size:
+                break
+
+    registry.increment('jobs.complete_bookings.runs')
+    return total
+
+
+@jobs_cli.command('complete-bookings')
+@click.option('--batch-size', type=int, default=None, help='Rows per batch (default JOB_BATCH_SIZE).')
+def complete_bookings_command(batch_size):
+    """Mark confirmed bookings of ended sessions as completed."""
+    click.echo(f'bookings: {complete_past_bookings(batch_size)} completed')
+
+
+# ==================== NOTIFICATION COUNTERS ====================
+
+@scheduled('reconcile_notification_counters', 'NOTIFICATION_COUNTER_RECONCILE_INTERVAL_MINUTES')
+def reconcile_notification_counters(batch_size=None):
+    """
+    Recount unread notifications and fix notification_counters rows that
+    drifted or are missing, walking users in batches of batch_size.
+
+    Each batch locks its existing counter rows before counting, so a
+    notification committed while the batch runs adjusts the corrected
+    counter afterwards instead of being overwritten.
+
+    Returns:
+        dict: Users checked and counters corrected
+    """
+    batch_size = batch_size or current_app.config['JOB_BATCH_SIZE']
+    checked = corrected = 0
+    last_user_id = ''
+
+    with timed_stage('jobs', 'reconcile_notification_counters'):
+        while True:
+            user_ids = db.session.execute(
+                select(User.user_id).where(User.user_id > last_user_id)
+                .order_by(User.user_id).limit(batch_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            db.session.execute(
+                select(NotificationCounter.user_id).where(
+                    NotificationCounter.user_id.in_(user_ids)
+                ).with_for_update()
+            ).all()
+
+            actual = dict(db.session.execute(
+                select(Notification.user_id, func.count(Notification.id)).where(
+                    Notification.user_id.in_(user_ids),
+                    Notification.is_read == False
+                ).group_by(Notification.user_id)
+            ).all())
+            stored = dict(db.session.execute(
+                select(NotificationCounter.user_id, NotificationCounter.unread_count).where(
+                    NotificationCounter.user_id.in_(user_ids)
+                )
+            ).all())
+
+            fixes = [
+                {'user_id': user_id, 'unread_count': actual.get(user_id, 0)}
+                for user_id in user_ids
+                if stored.get(user_id) != actual.get(user_id, 0)
+            ]
+            if fixes:
+                upsert = dialect_insert(NotificationCounter)
+                db.session.execute(
+                    upsert.on_conflict_do_update(
+                        index_elements=['user_id'],
+                        set_={'unread_count': upsert.excluded.unread_count, 'updated_at': func.now()}
+                    ),
+                    fixes
+                )
+            db.session.commit()
+
+            checked += len(user_ids)
+            corrected += len(fixes)
+            registry.increment('jobs.reconcile_notification_counters.corrected', len(fixes))
+
+            if len(user_ids) < batch_size:
+                break
+
+    registry.increment('jobs.reconcile_notification_counters.runs')
+    return {'checked': checked, 'corrected': corrected}
+
+
+@jobs_cli.command('reconcile-notification-counters')
+@click.option('--batch-size', type=int, default=None, help='Users per batch (default JOB_BATCH_SIZE).')
+def reconcile_notification_counters_command(batch_size):
+    """Recount unread notifications and fix drifted counters."""
+    result = reconcile_notification_counters(batch_size)
+    click.echo(f"users: {result['checked']} checked, {result['corrected']} counters corrected")
+
+
+# ==================== NOTIFICATION RETENTION ====================
+
+ARCHIVED_COLUMNS = ('id', 'user_id', 'message', 'is_read', 'link', 'created_at')
+
+
+def archive_notifications(ids):
+    """Copy notifications into notifications_archive and delete them, in the caller's transaction"""
+    db.session.execute(
+        insert(NotificationArchive).from_select(
+            ARCHIVED_COLUMNS,
+            select(*(getattr(Notification, column) for column in ARCHIVED_COLUMNS)).where(Notification.id.in_(ids))
+        )
+    )
+    db.session.execute(
+        delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+
+
+def archive_read_notifications(retention_days, batch_size, dry_run=False):
+    """Move read notifications older than retention_days to the archive, one batch per commit"""
+    expired = select(Notification.id).where(
+        Notification.is_read == True,
+        Notification.created_at < dialect_days_ago(retention_days)
+    )
+
+    if dry_run:
+        return db.session.execute(select(func.count()).select_from(expired.subquery())).scalar()
+
+    # SKIP LOCKED keeps concurrent runs on disjoint batches
+    batch_query = expired.order_by(Notification.id).limit(batch_size).with_for_update(skip_locked=True)
+    total = 0
+    while True:
+        ids = db.session.execute(batch_query).scalars().all()
+        if not ids:
+            break
+
+        archive_notifications(ids)
+        db.session.commit()
+
+        total += len(ids)
+        registry.increment('jobs.notification_retention.archived', len(ids))
+
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+def collapse_unread_notifications(unread_cap, batch_size, dry_run=False):
+    """
+    For users with more than unread_cap unread notifications, archive the
+    oldest ones and leave a single summary in their place, so each user ends
+    up with at most unread_cap unread notifications.
+
+    Returns:
+        tuple: (users affected, notifications collapsed)
+    """
+    over_cap = db.session.execute(
+        select(Notification.user_id, func.count(Notification.id)).where(
+            Notification.is_read == False
+        ).group_by(Notification.user_id).having(func.count(Notification.id) > unread_cap)
+    ).all()
+
+    # The newest unread_cap - 1 stay, plus the summary
+    excess = {user_id: count - unread_cap + 1 for user_id, count in over_cap}
+    if dry_run:
+        return len(excess), sum(excess.values())
+
+    users = list(excess.items())
+    collapsed = 0
+    for start in range(0, len(users), batch_size):
+        summaries = []
+        deltas = {}
+        batch_collapsed = 0
+        for user_id, count in users[start:start + batch_size]:
+            ids = db.session.execute(
+                select(Notification.id).where(
+                    Notification.user_id == user_id,
+                    Notification.is_read == False
+                ).order_by(Notification.created_at, Notification.id).limit(count).with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not ids:
+                continue
+
+            archive_notifications(ids)
+            summaries.append({
+                'user_id': user_id,
+                'message': f"You have {len(ids)} older unread notifications that were archived.",
+                'link': None,
+                'is_read': False
+            })
+            batch_collapsed += len(ids)
+            # Removed ids, plus one for the summary
+            deltas[user_id] = 1 - len(ids)
+
+        if summaries:
+            db.session.execute(insert(Notification), summaries)
+            adjust_unread_counts(deltas)
+            notify_changed(summary['user_id'] for summary in summaries)
+        db.session.commit()
+
+        collapsed += batch_collapsed
+        registry.increment('jobs.notification_retention.collapsed', batch_collapsed)
+        registry.increment('jobs.notification_retention.summaries', len(summaries))
+
+    return len(users), collapsed
+
+
+@scheduled('notification_retention', 'NOTIFICATION_RETENTION_INTERVAL_MINUTES')
+def apply_notification_retention(retention_days=None, unread_cap=None, batch_size=None, dry_run=False):
+    """
+    Keep the notifications table small: archive old read notifications and
+    collapse unread ones beyond the per-user cap into a summary.
+
+    With dry_run nothing is written; the result reports what would change.
+
+    Returns:
+        dict: Notifications archived, users collapsed and notifications collapsed
+    """
+    # An explicit 0 is a value, not "use the default"
+    if retention_days is None:
+        retention_days = current_app.config['NOTIFICATION_RETENTION_DAYS']
+    if unread_cap is None:
+        unread_cap = current_app.config['NOTIFICATION_UNREAD_CAP']
+    batch_size = batch_size or current_app.config['JOB_BATCH_SIZE']
+
+    with timed_stage('jobs', 'notification_retention'):
+        archived = archive_read_notifications(retention_days, batch_size, dry_run)
+        users, collapsed = collapse_unread_notifications(unread_cap, batch_size, dry_run)
+
+    registry.increment('jobs.notification_retention.dry_runs' if dry_run else 'jobs.notification_retention.runs')
+    return {
+        'archived': archived,
+        'collapsed_users': users,
+        'collapsed': collapsed,
+        'dry_run': dry_run
+    }
+
+
+@jobs_cli.command('notification-retention')
+@click.option('--retention-days', type=click.IntRange(min=0), default=None, help='Archive read notifications older than this (default NOTIFICATION_RETENTION_DAYS).')
+@click.option('--unread-cap', type=click.IntRange(min=1), default=None, help='Unread notifications kept per user, summary included (default NOTIFICATION_UNREAD_CAP).')
+@click.option('--batch-size', type=int, default=None, help='Rows/users per batch (default JOB_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Report what would change without writing.')
+def notification_retention_command(retention_days, unread_cap, batch_size, dry_run):
+    """Archive old read notifications and collapse unread ones beyond the cap."""
+    result = apply_notification_retention(retention_days, unread_cap, batch_size, dry_run)
+    verb = 'would be' if dry_run else 'were'
+    click.echo(f"notifications: {result['archived']} read {verb} archived")
+    click.echo(f"notifications: {result['collapsed']} unread {verb} collapsed for {result['collapsed_users']} users")
+
+
+# ==================== SCHEDULER ====================
+
+_scheduler_lock = threading.Lock()
+_scheduler_started = False
+
+
+def _run_scheduler(app, poll_seconds=30):
+    next_run = {name: 0 for name in SCHEDULE}
+    while True:
+        for name, (job, interval_key) in SCHEDULE.items():
+            if time.monotonic() < next_run[name]:
+                continue
+
+            with app.app_context():
+                try:
+                    job()
+                except Exception:
+                    db.session.rollback()
+                    registry.increment(f'jobs.{name}.errors')
+                    current_app.logger.exception(f"Error running job {name}")
+
+            next_run[name] = time.monotonic() + app.config[interval_key] * 60
+        time.sleep(poll_seconds)
+
+
+def ensure_scheduler():
+    """Start this process's scheduler thread once, from the first request it serves"""
+    global _scheduler_started
+    if _scheduler_started:
+        return
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        threading.Thread(
+            target=_run_scheduler,
+            args=(current_app._get_current_object(),),
+            name='job-scheduler',
+            daemon=True
+        ).start()
+        _scheduler_started = True
+
+
+def init_app(app):
+    """
+    Register the `jobs` CLI group and, if JOB_SCHEDULER_ENABLED is set, run
+    the scheduler in every process that serves requests. It starts with the
+    first request rather than at import, so CLI commands (`flask jobs ...`,
+    `flask shell`) and the debug reloader's file-watching parent, which load
+    the app but never serve, do not start one. Jobs are idempotent, so
+    schedulers in several workers only repeat work.
+    """
+    app.cli.add_command(jobs_cli)
+
+    if app.config.get('JOB_SCHEDULER_ENABLED'):
+        app.before_request(ensure_scheduler)
@@ -0,0 +1,155 @@
+"""
+In-process metrics for the gym management system.
+Stage timings and query counts are collected into histograms, and job
+progress into counters. Both live in this process only; read them back
+through the /api/metrics endpoint.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Bucket upper bounds shared by every histogram (ms for durations, plain counts for queries)
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_local = threading.local()
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[idx] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def snapshot(self):
+        buckets = {str(bound): n for bound, n in zip(self.buckets, self.bucket_counts)}
+        buckets['+Inf'] = self.bucket_counts[-1]
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'avg': round(self.total / self.count, 3) if self.count else 0,
+            'min': self.min,
+            'max': self.max,
+            'buckets': buckets
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of named histograms and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self, prefix=None):
+        with self._lock:
+            return {
+                'histograms': {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self._histograms.items())
+                    if not prefix or name.startswith(prefix)
+                },
+                'counters': {
+                    name: value
+                    for name, value in sorted(self._counters.items())
+                    if not prefix or name.startswith(prefix)
+                }
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+registry = MetricsRegistry()
+
+
+def query_count():
+    """Number of SQL statements executed so far on the current thread"""
+    return getattr(_local, 'queries', 0)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _local.queries = query_count() + 1
+
+
+@contextmanager
+def timed_stage(pipeline, stage):
+    """
+    Time a named stage of a pipeline and count the queries it runs.
+
+    Records `<pipeline>.<stage>.ms` and `<pipeline>.<stage>.queries` and, inside a
+    request, remembers the timing for the Server-Timing header.
+
+    Usage:
+        with timed_stage('checkout.process', 'payment'):
+            ...
+    """
+    started = time.perf_counter()
+    queries_before = query_count()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        queries = query_count() - queries_before
+
+        registry.observe(f'{pipeline}.{stage}.ms', elapsed_ms)
+        registry.observe(f'{pipeline}.{stage}.queries', queries)
+
+        if has_request_context():
+            if 'server_timing' not in g:
+                g.server_timing = []
+            g.server_timing.append((stage, elapsed_ms, queries))
+
+
+def _add_server_timing(response):
+    timings = g.pop('server_timing', None)
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{name};dur={elapsed:.2f};desc="{queries} queries"'
+            for name, elapsed, queries in timings
+        )
+    return response
+
+
+def init_app(app):
+    """Install the query counter and, if enabled, the Server-Timing header"""
+    if not event.contains(Engine, 'before_cursor_execute', _count_query):
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+
+    if app.config.get('SERVER_TIMING_ENABLED'):
+        app.after_request(_add_server_timing)
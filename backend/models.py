@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, date
-from sqlalchemy import func, CheckConstraint
+from datetime import datetime, date, timedelta
+from sqlalchemy import func, CheckConstraint, DDL, event
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 
@@ -11,6 +12,30 @@ def generate_uuid():
     """Generate UUID as string for primary keys"""
     return str(uuid.uuid4())
 
+
+def dialect_insert(model):
+    """INSERT construct for the bound database, so ON CONFLICT upserts work on Postgres and SQLite"""
+    if db.engine.dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def dialect_greatest(*expressions):
+    """GREATEST(...) on Postgres; SQLite spells the scalar form max(...)"""
+    if db.engine.dialect.name == 'sqlite':
+        return func.max(*expressions)
+    return func.greatest(*expressions)
+
+
+def dialect_days_ago(days):
+    """
+    The database clock minus `days` days, for cutoffs on server_default=func.now()
+    timestamps: both sides come from the same clock, whatever the app server's time zone.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return func.datetime('now', f'-{int(days)} days')
+    return func.now() - timedelta(days=days)
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -197,10 +222,21 @@ class TrainerSession(db.Model):
     current_bookings = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     trainer = db.relationship('User', backref='sessions')
     class_type = db.relationship('ClassType')
 
+    __table_args__ = (
+        # Keyset pagination of the member session browser
+        db.Index(
+            'ix_trainer_sessions_schedule', 'date', 'start_time', 'id',
+            postgresql_where=db.text('is_active')
+        ),
+        # Trainer calendar range reads
+        db.Index('ix_trainer_sessions_trainer_date', 'trainer_id', 'date'),
+    )
+
     @property
     def is_full(self):
         return self.current_bookings >= self.max_members
@@ -209,6 +245,25 @@ class TrainerSession(db.Model):
     def spots_remaining(self):
         return self.max_members - self.current_bookings
 
+# A trainer cannot teach two active sessions at once. Postgres enforces this
+# with an exclusion constraint (GiST over trainer_id and the session's
+# half-open time range), so concurrent inserts cannot both succeed; other
+# databases fall back to the query in scheduling.find_trainer_overlap.
+event.listen(
+    db.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS btree_gist').execute_if(dialect='postgresql')
+)
+event.listen(
+    TrainerSession.__table__,
+    'after_create',
+    DDL(
+        'ALTER TABLE trainer_sessions ADD CONSTRAINT excl_trainer_sessions_no_overlap '
+        'EXCLUDE USING gist (trainer_id WITH =, tsrange(date + start_time, date + end_time) WITH &&) '
+        'WHERE (is_active)'
+    ).execute_if(dialect='postgresql')
+)
+
 # Booking - members book into sessions
 class Booking(db.Model):
     __tablename__ = 'bookings'
@@ -224,13 +279,18 @@ class Booking(db.Model):
         db.ForeignKey('trainer_sessions.id'),
         nullable=False
     )
-    status = db.Column(db.String(20), default='confirmed')  # confirmed, cancelled, completed
+    status = db.Column(db.String(20), default='confirmed')  # confirmed, cancelled, completed, no_show
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
     member = db.relationship('User', backref='bookings')
     session = db.relationship('TrainerSession', backref='bookings')
 
+    __table_args__ = (
+        # Status-scoped lookups by session (auto-completion job, session rosters)
+        db.Index('ix_bookings_status_session', 'status', 'session_id'),
+    )
+
 # Cart (cart is temporary, order is permanent)
 class Cart(db.Model):
     __tablename__ = 'carts'
@@ -238,6 +298,12 @@ class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=func.now())
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())  # last activity, used by the cart sweeper
+
+    # One cart per user, so add-to-cart can create it with an upsert
+    __table_args__ = (
+        db.UniqueConstraint('user_id', name='unique_cart_per_user'),
+    )
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
@@ -249,6 +315,11 @@ class CartItem(db.Model):
 
     product = db.relationship('Products')
 
+    # One line per product - repeated adds bump the quantity instead
+    __table_args__ = (
+        db.UniqueConstraint('cart_id', 'product_id', name='unique_product_per_cart'),
+    )
+
 # Order and Order Items (after checkout)
 class Order(db.Model):
     __tablename__ = 'orders'
@@ -273,6 +344,7 @@ class SessionCart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=func.now())
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())  # last activity, used by the cart sweeper
 
     user = db.relationship('User', backref='session_cart')
 
@@ -319,3 +391,37 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     link = db.Column(db.String(255), nullable=True)  # Optional link related to the notification
     created_at = db.Column(db.DateTime, server_default=func.now())
+
+    # Load created_at at insert (RETURNING) so new notifications can be pushed to live streams
+    __mapper_args__ = {'eager_defaults': True}
+
+    __table_args__ = (
+        # Unread counts when a user has no notification_counters row yet
+        db.Index('ix_notifications_user_unread', 'user_id', postgresql_where=db.text('NOT is_read')),
+    )
+
+
+class NotificationArchive(db.Model):
+    """Notifications moved out of the hot table by the retention job; ids are kept from notifications"""
+    __tablename__ = 'notifications_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), nullable=False, index=True)
+    message = db.Column(db.Text, nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    link = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, server_default=func.now())
+
+
+class NotificationCounter(db.Model):
+    """
+    Per-user unread notification count, adjusted in the same transaction as
+    the notification writes (see Notifications.py). A missing row is created
+    by the first adjustment or read for the user, or by the reconciliation job.
+    """
+    __tablename__ = 'notification_counters'
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.user_id'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,222 @@
+"""
+Live notification delivery for the gym management system.
+Connected clients hold a Server-Sent Events stream (see the notifications
+blueprint); this module tells those streams when a user's notifications
+change, so browsers no longer poll the unread count.
+
+Changes are collected on the SQLAlchemy session and published only after
+the transaction commits, so a rolled-back notification is never pushed:
+new Notification objects are picked up at flush, and set-based writers
+(bulk inserts, INSERT ... SELECT, mark-all-read) call notify_changed()
+with the affected user ids.
+
+Two backends carry events to the streams:
+
+- 'local' (default): an in-process pub/sub. Only streams served by the
+  same process see the event, which is enough for a single worker.
+- 'postgres': events are sent with pg_notify() inside the committing
+  transaction, and every process runs one LISTEN thread that hands them
+  to its own streams. Use this with several workers.
+"""
+import json
+import queue
+import select
+import threading
+from flask import current_app
+from sqlalchemy import event, func, select as sql_select
+from models import db, Notification
+
+# Postgres channel used by the 'postgres' backend
+CHANNEL = 'gym_notifications'
+
+# pg_notify payloads must stay below 8000 bytes; larger events are sent without the notification body
+MAX_NOTIFY_PAYLOAD = 7000
+
+# Events buffered per stream before it is told to resync instead
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class NotificationBroker:
+    """Thread-safe user_id -> set of subscriber queues"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def deliver(self, user_id, payload):
+        """Hand an event to every stream of user_id in this process"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(payload)
+            except queue.Full:
+                # A stalled client: replace its backlog with a single resync
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait({'type': 'changed'})
+
+
+broker = NotificationBroker()
+
+_listener_lock = threading.Lock()
+_listener_started = False
+
+
+def _backend():
+    return current_app.config.get('NOTIFICATION_STREAM_BACKEND', 'local')
+
+
+def notification_payload(notification):
+    """Same shape as the notifications list endpoint; reads only loaded attributes, never the database"""
+    created_at = notification.__dict__.get('created_at')
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'link': notification.link,
+        'is_read': bool(notification.is_read),
+        'created_at': created_at.isoformat() if created_at else None
+    }
+
+
+def notify_changed(user_ids, session=None):
+    """
+    Tell the streams of user_ids that their notifications changed, once the
+    current transaction commits. For writes that bypass the ORM unit of work.
+    """
+    session = session or db.session()
+    pending = session.info.setdefault('notification_users', set())
+    pending.update(user_ids)
+
+
+def _pending_events(session):
+    """(user_id, event) pairs collected in this transaction"""
+    events = list(session.info.get('notification_objects', ()))
+    announced = {user_id for user_id, _ in events}
+    events.extend(
+        (user_id, {'type': 'changed'})
+        for user_id in session.info.get('notification_users', ())
+        if user_id not in announced
+    )
+    return events
+
+
+def _clear_pending(session):
+    session.info.pop('notification_objects', None)
+    session.info.pop('notification_users', None)
+
+
+def _collect_new(session, flush_context):
+    # Payloads are built now: after commit the objects are expired and cannot be loaded
+    new = [
+        (obj.user_id, {'type': 'notification', 'notification': notification_payload(obj)})
+        for obj in session.new if isinstance(obj, Notification)
+    ]
+    if new:
+        session.info.setdefault('notification_objects', []).extend(new)
+
+
+def _publish_in_transaction(session):
+    """Postgres backend: NOTIFY is delivered by the server only if this transaction commits"""
+    if _backend() != 'postgres':
+        return
+
+    # Flush now so notifications added since the last flush are collected before the NOTIFYs
+    session.flush()
+    if not session.info.get('notification_objects') and not session.info.get('notification_users'):
+        return
+
+    for user_id, payload in _pending_events(session):
+        message = json.dumps({'user_id': user_id, 'event': payload})
+        if len(message) > MAX_NOTIFY_PAYLOAD:
+            message = json.dumps({'user_id': user_id, 'event': {'type': 'changed'}})
+        session.execute(sql_select(func.pg_notify(CHANNEL, message)))
+    _clear_pending(session)
+
+
+def _publish_after_commit(session):
+    """Local backend: hand committed events straight to this process's streams"""
+    events = _pending_events(session)
+    _clear_pending(session)
+    for user_id, payload in events:
+        broker.deliver(user_id, payload)
+
+
+def _discard(session, *args):
+    _clear_pending(session)
+
+
+def _listen(app, poll_seconds=5):
+    """LISTEN on CHANNEL and hand every event to the local broker; reconnects on failure"""
+    while True:
+        connection = None
+        try:
+            with app.app_context():
+                connection = db.engine.raw_connection()
+            # Never hand a LISTENing autocommit connection back to the pool
+            connection.detach()
+            driver_connection = connection.driver_connection
+            driver_connection.autocommit = True
+            cursor = driver_connection.cursor()
+            cursor.execute(f'LISTEN {CHANNEL}')
+
+            while True:
+                if select.select([driver_connection], [], [], poll_seconds) == ([], [], []):
+                    continue
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    notify = driver_connection.notifies.pop(0)
+                    message = json.loads(notify.payload)
+                    broker.deliver(message['user_id'], message['event'])
+        except Exception as e:
+            print(f"Notification listener error: {e}")
+            threading.Event().wait(poll_seconds)
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+
+def ensure_listener():
+    """Start this process's LISTEN thread (postgres backend only) on first subscription"""
+    global _listener_started
+    if _backend() != 'postgres' or _listener_started:
+        return
+    with _listener_lock:
+        if _listener_started:
+            return
+        threading.Thread(
+            target=_listen,
+            args=(current_app._get_current_object(),),
+            name='notification-listener',
+            daemon=True
+        ).start()
+        _listener_started = True
+
+
+def init_app(app):
+    """Hook the publisher into the app's database sessions"""
+    event.listen(db.session, 'after_flush', _collect_new)
+    event.listen(db.session, 'before_commit', _publish_in_transaction)
+    event.listen(db.session, 'after_commit', _publish_after_commit)
+    event.listen(db.session, 'after_rollback', _discard)
@@ -0,0 +1,102 @@
+"""
+Benchmark notification fan-out against a scratch database.
+
+Seeds N synthetic recipients (emails end in @notify-bench.invalid), then
+notifies all of them twice: once with the per-recipient helper that
+commits every row, and once with create_notifications_bulk(). Prints the
+elapsed time and rows/second for each. Benchmark users, their
+notifications and their unread counters are deleted at the end unless
+--keep is given.
+
+The database URL must be passed explicitly so this never runs against
+the app's configured database by accident:
+
+    python notifications_benchmark.py --database-url postgresql://postgres:pw@localhost:5432/gym_bench --recipients 10000
+"""
+import argparse
+import time
+import uuid
+from flask import Flask
+from sqlalchemy import insert, delete, select
+from models import db, User, Notification, NotificationCounter
+from Notifications import create_notification, create_notifications_bulk
+
+BENCH_DOMAIN = 'notify-bench.invalid'
+MESSAGE = 'The Yoga session scheduled for 2024-12-01 has been cancelled by the trainer.'
+LINK = '/member/dashboard/classes'
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed_recipients(count, batch_size=5000):
+    rows = [{
+        'user_id': str(uuid.uuid4()),
+        'email': f'recipient{i}@{BENCH_DOMAIN}',
+        'password_hash': 'x',
+        'first_name': 'Bench',
+        'last_name': f'Recipient{i}',
+        'role': 'Member'
+    } for i in range(count)]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(User), rows[start:start + batch_size])
+    db.session.commit()
+    return [row['user_id'] for row in rows]
+
+
+def run_per_row(user_ids):
+    started = time.perf_counter()
+    for user_id in user_ids:
+        create_notification(user_id, MESSAGE, LINK)
+    return time.perf_counter() - started
+
+
+def run_bulk(user_ids):
+    started = time.perf_counter()
+    create_notifications_bulk({'user_id': user_id, 'message': MESSAGE, 'link': LINK} for user_id in user_ids)
+    return time.perf_counter() - started
+
+
+def cleanup():
+    bench_users = select(User.user_id).where(User.email.like(f'%@{BENCH_DOMAIN}'))
+    db.session.execute(delete(Notification).where(Notification.user_id.in_(bench_users)))
+    db.session.execute(delete(NotificationCounter).where(NotificationCounter.user_id.in_(bench_users)))
+    db.session.execute(delete(User).where(User.email.like(f'%@{BENCH_DOMAIN}')))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notification fan-out.')
+    parser.add_argument('--database-url', required=True, help='Scratch database to seed and write to (required).')
+    parser.add_argument('--recipients', type=int, default=10000, help='Number of recipients (default 10000).')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark users and notifications afterwards.')
+    args = parser.parse_args()
+
+    app = create_app(args.database_url)
+    with app.app_context():
+        # Only the tables the fan-out touches, so the scratch database can stay minimal
+        db.metadata.create_all(
+            db.engine,
+            tables=[User.__table__, Notification.__table__, NotificationCounter.__table__]
+        )
+        cleanup()
+        print(f'Seeding {args.recipients} recipients...')
+        user_ids = seed_recipients(args.recipients)
+
+        print(f'{"method":<28}{"seconds":>10}{"rows/s":>12}')
+        for name, run in (('per-row commit', run_per_row), ('create_notifications_bulk', run_bulk)):
+            elapsed = run(user_ids)
+            print(f'{name:<28}{elapsed:>10.2f}{len(user_ids) / elapsed:>12.0f}')
+
+        if not args.keep:
+            cleanup()
+            print('Benchmark users and notifications deleted.')
+
+
+if __name__ == '__main__':
+    main()
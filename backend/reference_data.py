@@ -0,0 +1,170 @@
+"""
+In-process cache of reference data for the gym management system.
+Class types, product/equipment categories and membership plans change
+rarely but are read on almost every catalog and schedule request, so
+serializers resolve names from this snapshot instead of joining or
+lazy-loading the related rows.
+
+The snapshot is loaded lazily (or at startup via refresh()) and is
+replaced whenever an admin/trainer write changes one of the tables.
+Each snapshot carries a content hash as its version, so every worker
+holding the same data reports the same version; responses that embed
+reference names (the trainer calendar) fold it into their ETag. Changes
+made by other processes are picked up after REFERENCE_DATA_TTL_SECONDS.
+An unknown id triggers one reload; if it is still unknown, the miss is
+remembered until the TTL expires or refresh() is called.
+"""
+import hashlib
+import json
+import threading
+import time
+from flask import current_app
+from models import ClassType, ProductCategory, EqipmentCategory
+
+# Membership plans configuration
+MEMBERSHIP_PLANS = {
+    'Monthly': {
+        'price': 50.0,
+        'duration_days': 30,
+        'description': 'Access to all gym facilities for 30 days'
+    },
+    'Quarterly': {
+        'price': 135.0,  # 10% discount
+        'duration_days': 90,
+        'description': 'Access to all gym facilities for 90 days'
+    },
+    'Yearly': {
+        'price': 480.0,  # 20% discount
+        'duration_days': 365,
+        'description': 'Access to all gym facilities for 1 year'
+    },
+    'Premium': {
+        'price': 100.0,
+        'duration_days': 30,
+        'description': 'Premium access with personal training sessions included'
+    },
+    'Student': {
+        'price': 35.0,
+        'duration_days': 30,
+        'description': 'Student discount membership (ID verification required)'
+    }
+}
+
+
+class ReferenceData:
+    """Read-only snapshot of the reference tables; never mutate it, call refresh() instead"""
+
+    def __init__(self, class_types, product_categories, equipment_categories, membership_plans):
+        self.class_types = class_types                    # id -> {'id', 'name', 'description', 'created_at'}
+        self.product_categories = product_categories      # id -> {'id', 'name', 'slug'}
+        self.equipment_categories = equipment_categories  # id -> {'id', 'name', 'slug'}
+        self.membership_plans = membership_plans          # [{'type', 'price', 'duration_days', 'description'}]
+        self.version = hashlib.md5(json.dumps(
+            [class_types, product_categories, equipment_categories, membership_plans],
+            sort_keys=True
+        ).encode()).hexdigest()
+        self.loaded_at = time.monotonic()
+        self.misses = set()                               # (table, key) pairs known to be absent
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def _load():
+    class_types = {
+        ct.id: {
+            'id': ct.id,
+            'name': ct.name,
+            'description': ct.description,
+            'created_at': ct.created_at.isoformat() if ct.created_at else None
+        }
+        for ct in ClassType.query.order_by(ClassType.name).all()
+    }
+    product_categories = {
+        c.id: {'id': c.id, 'name': c.name, 'slug': c.slug}
+        for c in ProductCategory.query.order_by(ProductCategory.id).all()
+    }
+    equipment_categories = {
+        c.id: {'id': c.id, 'name': c.name, 'slug': c.slug}
+        for c in EqipmentCategory.query.order_by(EqipmentCategory.id).all()
+    }
+    membership_plans = [
+        {'type': plan_type, **details}
+        for plan_type, details in MEMBERSHIP_PLANS.items()
+    ]
+    return ReferenceData(class_types, product_categories, equipment_categories, membership_plans)
+
+
+def _install(snapshot):
+    global _snapshot
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def refresh():
+    """Reload every reference table; call after committing a change to one of them"""
+    return _install(_load())
+
+
+def get_reference_data():
+    """Current snapshot, loading it on first use or once it is older than the TTL"""
+    snapshot = _snapshot
+    ttl = current_app.config.get('REFERENCE_DATA_TTL_SECONDS', 300)
+    if snapshot is None or time.monotonic() - snapshot.loaded_at > ttl:
+        snapshot = refresh()
+    return snapshot
+
+
+def _lookup(table, key):
+    if key is None:
+        return None
+    snapshot = get_reference_data()
+    entry = getattr(snapshot, table).get(key)
+    if entry is not None or (table, key) in snapshot.misses:
+        return entry
+
+    # Possibly created by another process since our last load: reload once,
+    # keeping the misses the new data still does not answer
+    previous = snapshot
+    snapshot = _load()
+    snapshot.misses = {miss for miss in previous.misses if miss[1] not in getattr(snapshot, miss[0])}
+    entry = getattr(snapshot, table).get(key)
+    if entry is None:
+        snapshot.misses.add((table, key))
+    _install(snapshot)
+    return entry
+
+
+def class_type_name(class_type_id):
+    entry = _lookup('class_types', class_type_id)
+    return entry['name'] if entry else None
+
+
+def product_category(category_id):
+    """{'id', 'name', 'slug'} for a product category id, or None"""
+    return _lookup('product_categories', category_id)
+
+
+def equipment_category(category_id):
+    """{'id', 'name', 'slug'} for an equipment category id, or None"""
+    return _lookup('equipment_categories', category_id)
+
+
+def product_category_name(category_id):
+    entry = product_category(category_id)
+    return entry['name'] if entry else None
+
+
+def equipment_category_name(category_id):
+    entry = equipment_category(category_id)
+    return entry['name'] if entry else None
+
+
+def class_type_summary(class_type_id):
+    """{'id', 'name', 'description'} for a class type id, or None"""
+    entry = _lookup('class_types', class_type_id)
+    if entry is None:
+        return None
+    return {'id': entry['id'], 'name': entry['name'], 'description': entry['description']}
@@ -0,0 +1,279 @@
+"""
+Time-conflict detection for the gym management system.
+Builds a per-date sorted interval index from a single fetch and checks
+candidate sessions against it, so callers never loop over lazy-loaded
+sessions to find overlaps.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import literal, union_all, select, text, and_, or_
+from sqlalchemy.exc import IntegrityError
+from models import db, TrainerSession, Booking, SessionCart, SessionCartItem
+from reference_data import class_type_name
+
+
+class IntervalIndex:
+    """
+    Time intervals grouped by date and kept sorted by start time.
+
+    Intervals are half-open [start, end), so back-to-back sessions
+    (one ends at 10:00, the next starts at 10:00) do not conflict.
+    """
+
+    def __init__(self):
+        self._starts = defaultdict(list)   # date -> sorted [(start, seq)]
+        self._entries = {}                 # seq -> (end, payload)
+        self._seq = 0
+
+    def add(self, day, start, end, payload):
+        self._seq += 1
+        insort(self._starts[day], (start, self._seq))
+        self._entries[self._seq] = (end, payload)
+
+    def overlaps(self, day, start, end):
+        """Return payloads of every interval on day that overlaps [start, end)"""
+        starts = self._starts.get(day)
+        if not starts:
+            return []
+
+        # Only intervals starting before `end` can overlap; of those, keep the ones ending after `start`
+        cutoff = bisect_left(starts, (end,))
+        found = []
+        for _, seq in starts[:cutoff]:
+            other_end, payload = self._entries[seq]
+            if other_end > start:
+                found.append(payload)
+        return found
+
+
+def bookable_session(now=None):
+    """
+    WHERE clause for sessions that can still be booked: active, not full and
+    not started. Session cart items outside it are hidden from the member.
+    """
+    now = now or datetime.now()
+    return and_(
+        TrainerSession.is_active == True,
+        TrainerSession.current_bookings < TrainerSession.max_members,
+        or_(
+            TrainerSession.date > now.date(),
+            and_(
+                TrainerSession.date == now.date(),
+                TrainerSession.start_time > now.time()
+            )
+        )
+    )
+
+
+def load_member_schedule(user_id, dates):
+    """
+    Fetch the member's session cart items and confirmed bookings on the given
+    dates in one UNION ALL query and index them by time.
+
+    Returns:
+        IntervalIndex: payloads are dicts with session_id, class_type,
+        start_time, end_time and source ('cart' or 'booking')
+    """
+    index = IntervalIndex()
+    if not dates:
+        return index
+
+    columns = (
+        TrainerSession.id.label('session_id'),
+        TrainerSession.date,
+        TrainerSession.start_time,
+        TrainerSession.end_time,
+        TrainerSession.class_type_id
+    )
+
+    # Only cart items the member can see (and remove) in the session cart
+    in_cart = select(*columns, literal('cart').label('source')).select_from(SessionCartItem).join(
+        SessionCart, SessionCartItem.cart_id == SessionCart.id
+    ).join(
+        TrainerSession, SessionCartItem.session_id == TrainerSession.id
+    ).where(
+        SessionCart.user_id == user_id,
+        TrainerSession.date.in_(dates),
+        bookable_session()
+    )
+
+    booked = select(*columns, literal('booking').label('source')).select_from(Booking).join(
+        TrainerSession, Booking.session_id == TrainerSession.id
+    ).where(
+        Booking.member_id == user_id,
+        Booking.status == 'confirmed',
+        TrainerSession.date.in_(dates)
+    )
+
+    for row in db.session.execute(union_all(in_cart, booked)):
+        index.add(row.date, row.start_time, row.end_time, {
+            'session_id': row.session_id,
+            'class_type': class_type_name(row.class_type_id),
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M'),
+            'source': row.source
+        })
+    return index
+
+
+def find_member_conflicts(user_id, sessions):
+    """
+    Check candidate sessions against the member's cart, confirmed bookings
+    and each other.
+
+    Candidates are taken in order; each one that is conflict-free is added
+    to the index, so a later candidate overlapping an earlier one is reported.
+
+    Args:
+        user_id (str): The member's UUID
+        sessions (list): TrainerSession objects
+
+    Returns:
+        dict: session_id -> list of conflicting schedule entries (empty list if none)
+    """
+    index = load_member_schedule(user_id, {s.date for s in sessions})
+
+    conflicts = {}
+    for session in sessions:
+        found = index.overlaps(session.date, session.start_time, session.end_time)
+        conflicts[session.id] = found
+        if not found:
+            index.add(session.date, session.start_time, session.end_time, {
+                'session_id': session.id,
+                'class_type': class_type_name(session.class_type_id),
+                'start_time': session.start_time.strftime('%H:%M'),
+                'end_time': session.end_time.strftime('%H:%M'),
+                'source': 'request'
+            })
+    return conflicts
+
+
+def load_trainer_schedule(trainer_id, date_from, date_to):
+    """
+    Fetch the trainer's active sessions between date_from and date_to
+    (inclusive) in one range query and index them by time.
+
+    Returns:
+        IntervalIndex: payloads are dicts with session_id, class_type,
+        date, start_time and end_time
+    """
+    index = IntervalIndex()
+
+    rows = db.session.execute(
+        select(
+            TrainerSession.id,
+            TrainerSession.date,
+            TrainerSession.start_time,
+            TrainerSession.end_time,
+            TrainerSession.class_type_id
+        ).where(
+            TrainerSession.trainer_id == trainer_id,
+            TrainerSession.is_active == True,
+            TrainerSession.date.between(date_from, date_to)
+        )
+    )
+
+    for row in rows:
+        index.add(row.date, row.start_time, row.end_time, {
+            'session_id': row.id,
+            'class_type': class_type_name(row.class_type_id),
+            'date': row.date.isoformat(),
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M')
+        })
+    return index
+
+
+# SQLSTATE raised by Postgres when excl_trainer_sessions_no_overlap rejects a row
+EXCLUSION_VIOLATION = '23P01'
+OVERLAP_CONSTRAINT = 'excl_trainer_sessions_no_overlap'
+
+# engine -> whether OVERLAP_CONSTRAINT exists there
+_overlap_constraint_present = {}
+
+
+def overlap_enforced_by_database():
+    """
+    True when the trainer no-overlap exclusion constraint exists.
+
+    The constraint is only created with a new trainer_sessions table, so
+    existing Postgres databases are checked in pg_constraint (once per
+    engine; restart after adding it by hand). Until then callers fall back
+    to find_trainer_overlap().
+    """
+    engine = db.engine
+    present = _overlap_constraint_present.get(engine)
+    if present is None:
+        present = False
+        if engine.dialect.name == 'postgresql':
+            with engine.connect() as connection:
+                present = connection.execute(
+                    text('SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = :name)'),
+                    {'name': OVERLAP_CONSTRAINT}
+                ).scalar()
+        _overlap_constraint_present[engine] = present
+    return present
+
+
+def is_overlap_violation(error):
+    """True if an IntegrityError came from the trainer no-overlap constraint"""
+    return (
+        isinstance(error, IntegrityError)
+        and getattr(error.orig, 'pgcode', None) == EXCLUSION_VIOLATION
+    )
+
+
+def find_trainer_overlap(trainer_id, day, start, end, exclude_id=None):
+    """
+    First active session of the trainer on `day` overlapping [start, end), or None.
+
+    Two half-open ranges overlap exactly when each starts before the other ends.
+    """
+    query = TrainerSession.query.filter(
+        TrainerSession.trainer_id == trainer_id,
+        TrainerSession.date == day,
+        TrainerSession.is_active == True,
+        TrainerSession.start_time < end,
+        TrainerSession.end_time > start
+    )
+    if exclude_id is not None:
+        query = query.filter(TrainerSession.id != exclude_id)
+    return query.first()
+
+
+def trainer_overlap_message(session):
+    """409 message for an existing session that blocks a new or moved one"""
+    if session is None:
+        return 'You already have a session scheduled at this time. You cannot teach two classes at the same time.'
+    return (
+        f'You already have a "{class_type_name(session.class_type_id)}" session scheduled from '
+        f'{session.start_time.strftime("%H:%M")} to {session.end_time.strftime("%H:%M")} '
+        'on this date. You cannot teach two classes at the same time.'
+    )
+
+
+def weekly_occurrences(start_date, end_date, weekdays, every_weeks=1):
+    """
+    Dates between start_date and end_date (inclusive) falling on the given
+    weekdays (0 = Monday ... 6 = Sunday), in every `every_weeks`-th week
+    counted from the week of start_date.
+    """
+    week_start = start_date - timedelta(days=start_date.weekday())
+    day = start_date
+    while day <= end_date:
+        weeks = (day - week_start).days // 7
+        if day.weekday() in weekdays and weeks % every_weeks == 0:
+            yield day
+        day += timedelta(days=1)
+
+
+def describe_conflict(conflict):
+    """Human readable message for a schedule entry returned by find_member_conflicts"""
+    times = f'from {conflict["start_time"]} to {conflict["end_time"]} on this date'
+
+    if conflict['source'] == 'cart':
+        return f'Time conflict: You already have a "{conflict["class_type"]}" session in your cart {times}'
+    if conflict['source'] == 'booking':
+        return f'Time conflict: You already have a booked "{conflict["class_type"]}" session {times}'
+    return f'Time conflict: Overlaps another requested "{conflict["class_type"]}" session {times}'
@@ -0,0 +1,121 @@
+"""
+Admin search over people and classes.
+
+On Postgres, matches are served by pg_trgm GIN indexes and ranked with
+word_similarity(), so typos and partial words still match and the best
+hits come first without scanning the users table. Other databases (SQLite
+in tests) fall back to a plain case-insensitive substring match, with
+prefix matches ranked first.
+
+The indexed expressions below must stay identical to the ones in the
+CREATE INDEX statements, or Postgres will not use the indexes.
+"""
+from sqlalchemy import DDL, event, case, func, literal, literal_column, or_
+from models import db, User, ClassType
+
+# Shorter queries match too much and cannot use trigram indexes; clients
+# should also debounce keystrokes (~300ms) before calling the search endpoint.
+MIN_QUERY_LENGTH = 3
+MAX_QUERY_LENGTH = 100
+
+# Minimum word_similarity for a fuzzy (non-substring) match to count
+WORD_SIMILARITY_THRESHOLD = 0.4
+
+
+def search_document(*columns):
+    """`col1 || ' ' || col2 ...` - the text a trigram index is built over"""
+    document = columns[0]
+    for column in columns[1:]:
+        document = document.op('||')(literal_column("' '")).op('||')(column)
+    return document
+
+
+def person_document(user_entity=User):
+    """Searchable text for a user (or an aliased User): name and email"""
+    return search_document(user_entity.first_name, user_entity.last_name, user_entity.email)
+
+
+def class_type_document():
+    return ClassType.name
+
+
+TRIGRAM_EXTENSION = DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+TRIGRAM_INDEXES = (
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_users_search_trgm ON users "
+        "USING gin ((first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+    ),
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_class_types_name_trgm ON class_types "
+        "USING gin (name gin_trgm_ops)"
+    ),
+)
+
+event.listen(db.metadata, 'before_create', TRIGRAM_EXTENSION.execute_if(dialect='postgresql'))
+event.listen(User.__table__, 'after_create', TRIGRAM_INDEXES[0].execute_if(dialect='postgresql'))
+event.listen(ClassType.__table__, 'after_create', TRIGRAM_INDEXES[1].execute_if(dialect='postgresql'))
+
+
+def ensure_indexes():
+    """Create the extension and trigram indexes on an existing Postgres database"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for statement in (TRIGRAM_EXTENSION,) + TRIGRAM_INDEXES:
+        db.session.execute(statement)
+    db.session.commit()
+
+
+def normalize_query(text):
+    """
+    Clean up a raw search string.
+
+    Returns:
+        str or None: The query to search for, or None if it is too short to run
+    """
+    text = ' '.join((text or '').split())[:MAX_QUERY_LENGTH]
+    if len(text) < MIN_QUERY_LENGTH:
+        return None
+    return text
+
+
+def _like_pattern(text, prefix_only=False):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix_only else f'%{escaped}%'
+
+
+def uses_trigrams():
+    """True when trigram indexes and word_similarity() are available (Postgres)"""
+    return db.engine.dialect.name == 'postgresql'
+
+
+def match(document, text):
+    """WHERE clause: document contains text, or (Postgres) fuzzily matches one of its words"""
+    contains = document.ilike(_like_pattern(text), escape='\\')
+    if not uses_trigrams():
+        return contains
+    # `q <% doc` is word_similarity(q, doc) > pg_trgm.word_similarity_threshold; both are GIN-indexable
+    return or_(contains, literal(text).op('<%')(document))
+
+
+def rank(document, text):
+    """ORDER BY key (higher is better) for rows matched by match()"""
+    if uses_trigrams():
+        return func.word_similarity(text, document)
+    return case((document.ilike(_like_pattern(text, prefix_only=True), escape='\\'), 1), else_=0)
+
+
+def rank_any(text, *documents):
+    """ORDER BY key for rows matched on any of several documents: the best of their ranks"""
+    ranks = [rank(document, text) for document in documents]
+    if uses_trigrams():
+        return func.greatest(*ranks)
+    return func.max(*ranks)  # SQLite's multi-argument max() is a scalar function
+
+
+def set_similarity_threshold():
+    """Apply WORD_SIMILARITY_THRESHOLD to the current transaction (Postgres only)"""
+    if uses_trigrams():
+        db.session.execute(
+            db.text('SELECT set_config(\'pg_trgm.word_similarity_threshold\', :threshold, true)'),
+            {'threshold': str(WORD_SIMILARITY_THRESHOLD)}
+        )
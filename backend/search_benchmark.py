@@ -0,0 +1,139 @@
+"""
+Benchmark admin search against a scratch database.
+
+Seeds N synthetic users (emails end in @search-bench.invalid), then times
+the legacy ILIKE-per-column filter against the trigram-backed search in
+search.py and prints the query plans. Benchmark users are deleted at the
+end unless --keep is given.
+
+The database URL must be passed explicitly so this never runs against
+the app's configured database by accident:
+
+    python search_benchmark.py --database-url postgresql://postgres:pw@localhost:5432/gym_bench --users 100000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+import uuid
+from flask import Flask
+from sqlalchemy import or_, select, insert, delete
+from models import db, User, ClassType
+import search
+
+BENCH_DOMAIN = 'search-bench.invalid'
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin']
+QUERIES = ['john', 'smith', 'jenifer', 'garcia', 'martinez@', 'zzzq']
+
+
+def create_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed_users(count, batch_size=5000):
+    existing = db.session.query(User.user_id).filter(User.email.like(f'%@{BENCH_DOMAIN}')).count()
+    rows = []
+    for i in range(existing, count):
+        first = random.choice(FIRST_NAMES)
+        last = random.choice(LAST_NAMES)
+        suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+        rows.append({
+            'user_id': str(uuid.uuid4()),
+            'email': f'{first.lower()}.{last.lower()}.{suffix}@{BENCH_DOMAIN}',
+            'password_hash': 'x',
+            'first_name': first,
+            'last_name': last,
+            'role': 'Member'
+        })
+        if len(rows) >= batch_size:
+            db.session.execute(insert(User), rows)
+            db.session.commit()
+            rows = []
+    if rows:
+        db.session.execute(insert(User), rows)
+        db.session.commit()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE users'))
+        db.session.commit()
+
+
+def legacy_query(text):
+    pattern = f'%{text}%'
+    return select(User.user_id).where(
+        or_(
+            User.first_name.ilike(pattern),
+            User.last_name.ilike(pattern),
+            User.email.ilike(pattern)
+        )
+    ).limit(20)
+
+
+def trigram_query(text):
+    document = search.person_document(User)
+    return select(User.user_id).where(
+        search.match(document, text)
+    ).order_by(search.rank(document, text).desc()).limit(20)
+
+
+def time_query(statement, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        db.session.execute(statement).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def explain(statement):
+    if db.engine.dialect.name != 'postgresql':
+        return ''
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    plan = db.session.execute(db.text(f'EXPLAIN (ANALYZE, BUFFERS) {compiled}')).scalars().all()
+    return '\n'.join(f'    {line}' for line in plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark admin search.')
+    parser.add_argument('--database-url', required=True, help='Scratch database to seed and query (required).')
+    parser.add_argument('--users', type=int, default=100000, help='Number of benchmark users (default 100000).')
+    parser.add_argument('--runs', type=int, default=20, help='Timed runs per query (default 20).')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark users afterwards.')
+    parser.add_argument('--explain', action='store_true', help='Print EXPLAIN ANALYZE output (Postgres).')
+    args = parser.parse_args()
+
+    app = create_app(args.database_url)
+    with app.app_context():
+        # Only the tables the search touches, so the scratch database can stay minimal
+        db.metadata.create_all(db.engine, tables=[User.__table__, ClassType.__table__])
+        search.ensure_indexes()
+        print(f'Seeding {args.users} users...')
+        seed_users(args.users)
+        search.set_similarity_threshold()
+
+        print(f'{"query":<14}{"legacy median/max ms":>24}{"trigram median/max ms":>26}')
+        for text in QUERIES:
+            legacy = time_query(legacy_query(text), args.runs)
+            trigram = time_query(trigram_query(text), args.runs)
+            print(f'{text:<14}{legacy[0]:>14.2f} / {legacy[1]:<8.2f}{trigram[0]:>16.2f} / {trigram[1]:<8.2f}')
+            if args.explain:
+                print('  legacy plan:')
+                print(explain(legacy_query(text)))
+                print('  trigram plan:')
+                print(explain(trigram_query(text)))
+
+        if not args.keep:
+            db.session.execute(delete(User).where(User.email.like(f'%@{BENCH_DOMAIN}')))
+            db.session.commit()
+            print('Benchmark users deleted.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Test fixtures: the app against an in-memory SQLite database.
+
+Run from backend/:
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+
+Postgres-only features (exclusion constraint, trigram indexes, LISTEN/NOTIFY)
+fall back to their SQLite paths here.
+"""
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+import pytest
+from sqlalchemy import types as sqltypes
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+
+import config
+
+config.Config.SQLALCHEMY_DATABASE_URI = 'sqlite://'
+config.Config.SQLALCHEMY_ENGINE_OPTIONS = {
+    'poolclass': StaticPool,
+    'connect_args': {'check_same_thread': False}
+}
+config.Config.JOB_SCHEDULER_ENABLED = False
+
+
+@compiles(sqltypes.ARRAY, 'sqlite')
+def _array_as_json(type_, compiler, **kw):
+    # Product/equipment image lists; SQLite has no ARRAY type
+    return 'JSON'
+
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import app as flask_app  # noqa: E402
+from models import db, User, ClassType, TrainerSession, Booking  # noqa: E402
+from availability import availability_cache  # noqa: E402
+import metrics  # noqa: E402
+import reference_data  # noqa: E402
+from blueprints.admin import bookings as admin_bookings  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True)
+    with flask_app.app_context():
+        db.create_all()
+        availability_cache.clear()
+        admin_bookings._dashboard_cache.clear()
+        reference_data.refresh()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    created = []
+
+    def make(role='Member', first_name='Test', last_name=None):
+        user = User(
+            email=f'{role.lower()}{len(created)}@example.com',
+            first_name=first_name,
+            last_name=last_name or f'{role}{len(created)}',
+            role=role,
+            gender='Other'
+        )
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        created.append(user)
+        return user
+    return make
+
+
+@pytest.fixture
+def class_type(app):
+    yoga = ClassType(name='Yoga', description='Stretch')
+    db.session.add(yoga)
+    db.session.commit()
+    reference_data.refresh()
+    return yoga
+
+
+@pytest.fixture
+def make_session(app, class_type):
+    class_type_id = class_type.id
+
+    def make(trainer, day=None, hour=8, price=20, max_members=10, current_bookings=0, is_active=True):
+        session = TrainerSession(
+            trainer_id=trainer.user_id,
+            class_type_id=class_type_id,
+            date=day or date.today() + timedelta(days=1),
+            start_time=time(hour),
+            end_time=time(hour + 1),
+            price=price,
+            max_members=max_members,
+            current_bookings=current_bookings,
+            is_active=is_active
+        )
+        db.session.add(session)
+        db.session.commit()
+        return session
+    return make
+
+
+@pytest.fixture
+def make_booking(app):
+    def make(member, session, status='confirmed'):
+        booking = Booking(member_id=member.user_id, session_id=session.id, status=status)
+        db.session.add(booking)
+        db.session.commit()
+        return booking
+    return make
+
+
+def auth_header(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=user.user_id)}'}
+
+
+class QueryCount:
+    value = 0
+
+
+@contextmanager
+def count_queries():
+    """
+    Count SQL statements run inside the block. The session is emptied first
+    so nothing is served from a previous request's identity map.
+    """
+    db.session.remove()
+    counted = QueryCount()
+    start = metrics.query_count()
+    yield counted
+    counted.value = metrics.query_count() - start
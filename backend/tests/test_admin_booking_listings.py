@@ -0,0 +1,40 @@
+import pytest
+from conftest import auth_header, count_queries
+
+
+def seed_bookings(make_user, make_session, make_booking, count):
+    # A distinct trainer and member per booking, so nothing is shared in the identity map
+    for _ in range(count):
+        trainer = make_user('Trainer')
+        member = make_user('Member')
+        make_booking(member, make_session(trainer))
+
+
+def listing(client, url, headers):
+    with count_queries() as queries:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['bookings'], queries.value
+
+
+@pytest.mark.parametrize('url, expected_queries', [
+    # Admin check + one joined query
+    ('/api/bookings/recent?limit=100', 2),
+    # Admin check + joined page query + pagination count
+    ('/api/bookings/all?per_page=100', 3),
+])
+def test_listing_query_count_does_not_grow_with_bookings(client, make_user, make_session, make_booking,
+                                                         url, expected_queries):
+    admin = make_user('Admin')
+    headers = auth_header(admin)
+
+    seed_bookings(make_user, make_session, make_booking, 2)
+    few, few_queries = listing(client, url, headers)
+
+    seed_bookings(make_user, make_session, make_booking, 20)
+    many, many_queries = listing(client, url, headers)
+
+    assert len(few) == 2
+    assert len(many) == 22
+    assert all(booking['trainer']['name'].startswith('Test Trainer') for booking in many)
+    assert few_queries == many_queries == expected_queries
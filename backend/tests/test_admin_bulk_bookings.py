@@ -0,0 +1,66 @@
+import pytest
+from models import db, Booking, TrainerSession
+from conftest import auth_header
+
+
+def current_bookings(session_id):
+    db.session.expire_all()
+    return db.session.get(TrainerSession, session_id).current_bookings
+
+
+def test_bulk_delete_releases_seats_only_for_confirmed(client, make_user, make_session, make_booking):
+    admin = make_user('Admin')
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    session_id = make_session(trainer, current_bookings=3).id
+    session = db.session.get(TrainerSession, session_id)
+    booking_ids = [
+        make_booking(member, session, status).id
+        for status in ('confirmed', 'completed', 'no_show', 'cancelled')
+    ]
+
+    response = client.post('/api/bookings/bulk/delete', json={'booking_ids': booking_ids},
+                           headers=auth_header(admin))
+
+    assert response.status_code == 200
+    assert sorted(response.get_json()['booking_ids']) == sorted(booking_ids)
+    assert response.get_json()['seats_released'] == {str(session_id): 1}
+    assert current_bookings(session_id) == 2
+
+
+def test_bulk_and_single_delete_agree(client, make_user, make_session, make_booking):
+    admin = make_user('Admin')
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    headers = auth_header(admin)
+    single_id = make_session(trainer, hour=8, current_bookings=1).id
+    bulk_id = make_session(trainer, hour=10, current_bookings=1).id
+    single_booking = make_booking(member, db.session.get(TrainerSession, single_id), 'completed').id
+    bulk_booking = make_booking(member, db.session.get(TrainerSession, bulk_id), 'completed').id
+
+    assert client.delete(f'/api/bookings/{single_booking}', headers=headers).status_code == 200
+    assert client.post('/api/bookings/bulk/delete', json={'booking_ids': [bulk_booking]},
+                       headers=headers).status_code == 200
+
+    assert current_bookings(single_id) == current_bookings(bulk_id) == 1
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'booking_ids': [True]}, 'booking_ids must be a non-empty list of booking ids'),
+    ({'booking_ids': ['1']}, 'booking_ids must be a non-empty list of booking ids'),
+    ({'filter': {'session_id': True}}, 'filter.session_id must be a session id'),
+    ({'filter': {'session_id': '4'}}, 'filter.session_id must be a session id'),
+    ({'filter': {'status': ['confirmed']}}, 'filter.status must be a booking status'),
+])
+def test_bulk_rejects_malformed_selection(client, make_user, make_session, make_booking, body, error):
+    admin = make_user('Admin')
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    make_booking(member, make_session(trainer))
+
+    response = client.patch('/api/bookings/bulk/cancel', json=body, headers=auth_header(admin))
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+    db.session.remove()
+    assert Booking.query.one().status == 'confirmed'
@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+import pytest
+from models import db, Booking, TrainerSession
+from conftest import auth_header
+
+
+@pytest.mark.parametrize('body', [
+    {'completed': [True]},
+    {'no_show': ['1']},
+    {'completed': [1.0]},
+])
+def test_attendance_rejects_non_integer_ids(client, make_user, make_session, make_booking, body):
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    session = make_session(trainer, day=date.today() - timedelta(days=1))
+    session_id = session.id
+    make_booking(member, session)
+
+    response = client.patch(f'/api/sessions/{session_id}/attendance', headers=auth_header(trainer), json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'completed and no_show must be lists of booking ids'
+    assert Booking.query.one().status == 'confirmed'
+
+
+def test_attendance_marks_bookings(client, make_user, make_session, make_booking):
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    session_id = make_session(trainer, day=date.today() - timedelta(days=1)).id
+    booking_id = make_booking(member, db.session.get(TrainerSession, session_id)).id
+
+    response = client.patch(f'/api/sessions/{session_id}/attendance', headers=auth_header(trainer),
+                            json={'completed': [booking_id]})
+
+    assert response.status_code == 200
+    db.session.remove()
+    assert db.session.get(Booking, booking_id).status == 'completed'
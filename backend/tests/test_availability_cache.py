@@ -0,0 +1,36 @@
+from availability import availability_cache
+from conftest import auth_header, count_queries
+
+
+def test_browse_takes_seat_counts_from_cache(client, make_user, make_session):
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    session_id = make_session(trainer, max_members=5).id
+    headers = auth_header(member)
+
+    response = client.get('/api/session-cart/available', headers=headers)
+    assert response.get_json()['sessions'][0]['spots_remaining'] == 5
+
+    # Written through by another endpoint of this process
+    availability_cache.put(session_id, 5, 3)
+    response = client.get('/api/session-cart/available', headers=headers)
+    assert response.get_json()['sessions'][0]['spots_remaining'] == 2
+
+
+def test_cancel_writes_seats_through_without_reloading(client, make_user, make_session, make_booking):
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    session = make_session(trainer, max_members=5, current_bookings=1, price=25)
+    session_id = session.id
+    booking_id = make_booking(member, session).id
+    headers = auth_header(member)
+
+    with count_queries() as queries:
+        response = client.post(f'/api/checkout/bookings/{booking_id}/cancel', headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['refund_amount'] == 25
+    assert availability_cache.get_many([session_id])[session_id]['current_bookings'] == 0
+    # Load booking and session, update both, and two notifications with their counters
+    # (UPDATE, then INSERT since neither user has one yet); nothing is reloaded after commit
+    assert queries.value == 10
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from conftest import auth_header, count_queries
+
+
+def test_dashboard_numbers_and_revenue(client, make_user, make_session, make_booking):
+    admin = make_user('Admin')
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+
+    yesterday = date.today() - timedelta(days=1)
+    past = make_session(trainer, day=yesterday, price=35)
+    today = make_session(trainer, day=date.today(), hour=20, price=10)
+    upcoming = make_session(trainer, price=20)
+    make_session(trainer, price=50, is_active=False)
+
+    for status in ('completed', 'completed', 'cancelled', 'confirmed'):
+        make_booking(member, past, status)
+    make_booking(member, today, 'confirmed')
+    for status in ('confirmed', 'completed', 'no_show'):
+        make_booking(member, upcoming, status)
+
+    response = client.get('/api/bookings/dashboard', headers=auth_header(admin))
+
+    assert response.status_code == 200
+    assert response.get_json()['stats'] == {
+        'total_sessions': 3,
+        'today_sessions': 1,
+        'upcoming_sessions': 2,
+        'total_bookings': 3,
+        'completed_bookings': 3,
+        'cancelled_bookings': 1,
+        # Session prices of completed bookings: 35 + 35 + 20
+        'total_revenue': 90.0
+    }
+
+
+def test_dashboard_query_count(client, make_user, make_session, make_booking):
+    admin = make_user('Admin')
+    trainer = make_user('Trainer')
+    member = make_user('Member')
+    for hour in range(8, 14):
+        session = make_session(trainer, hour=hour)
+        make_booking(member, session, 'completed')
+    headers = auth_header(admin)
+
+    # Admin check + one aggregate query
+    with count_queries() as queries:
+        assert client.get('/api/bookings/dashboard', headers=headers).status_code == 200
+    assert queries.value == 2
+
+    # Cached: only the admin check
+    with count_queries() as queries:
+        assert client.get('/api/bookings/dashboard', headers=headers).status_code == 200
+    assert queries.value == 1
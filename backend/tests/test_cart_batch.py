@@ -0,0 +1,44 @@
+import pytest
+from models import db, ProductCategory, Products, CartItem
+from conftest import auth_header
+
+
+@pytest.fixture
+def product(app):
+    category = ProductCategory(name='Supplements', slug='supplements')
+    db.session.add(category)
+    db.session.flush()
+    product = Products(name='Protein', description='Whey', price=10, product_category_id=category.id)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+@pytest.mark.parametrize('operation, error', [
+    ({'op': 'add', 'product_id': 1, 'quantity': True}, 'Operation 0: quantity must be at least 1'),
+    ({'op': 'set', 'product_id': 1, 'quantity': 2.5}, 'Operation 0: quantity must be at least 1'),
+    ({'op': 'add', 'product_id': '1'}, 'Operation 0: product_id must be an integer'),
+    ({'op': 'add', 'product_id': True}, 'Operation 0: product_id must be an integer'),
+    ({'op': 'remove', 'cart_item_id': 'abc'}, 'Operation 0: cart_item_id must be an integer'),
+])
+def test_batch_rejects_non_integer_fields(client, make_user, product, operation, error):
+    member = make_user('Member')
+
+    response = client.patch('/api/cart/cart', headers=auth_header(member), json={'operations': [operation]})
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+    assert CartItem.query.count() == 0
+
+
+def test_batch_applies_valid_operations(client, make_user, product):
+    member = make_user('Member')
+    product_id = product.id
+
+    response = client.patch('/api/cart/cart', headers=auth_header(member), json={'operations': [
+        {'op': 'add', 'product_id': product_id, 'quantity': 2},
+        {'op': 'set', 'product_id': product_id, 'quantity': 3}
+    ]})
+
+    assert response.status_code == 200
+    assert [(item.product_id, item.quantity) for item in CartItem.query.all()] == [(product_id, 3)]
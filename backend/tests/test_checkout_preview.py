@@ -0,0 +1,55 @@
+from models import db, ProductCategory, Products, Cart, CartItem, SessionCart, SessionCartItem
+from conftest import auth_header, count_queries
+
+
+def fill_carts(member, trainer, make_session, size):
+    category = ProductCategory(name=f'Supplements {size}', slug=f'supplements-{size}')
+    db.session.add(category)
+    db.session.flush()
+    cart = Cart(user_id=member.user_id)
+    session_cart = SessionCart(user_id=member.user_id)
+    db.session.add_all([cart, session_cart])
+    db.session.flush()
+
+    for i in range(size):
+        product = Products(
+            name=f'Protein {i}',
+            description='Whey',
+            price=10,
+            product_category_id=category.id
+        )
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=2))
+    db.session.commit()
+
+    for i in range(size):
+        session = make_session(trainer, hour=8 + i, price=20)
+        db.session.add(SessionCartItem(cart_id=session_cart.id, session_id=session.id))
+    db.session.commit()
+
+
+def preview(client, headers):
+    with count_queries() as queries:
+        response = client.get('/api/checkout/preview', headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), queries.value
+
+
+def test_preview_query_count_does_not_grow_with_cart(client, make_user, make_session):
+    trainer = make_user('Trainer')
+    small = make_user('Member')
+    large = make_user('Member')
+    fill_carts(small, trainer, make_session, 1)
+    fill_carts(large, trainer, make_session, 8)
+
+    small_headers, large_headers = auth_header(small), auth_header(large)
+
+    small_preview, small_queries = preview(client, small_headers)
+    large_preview, large_queries = preview(client, large_headers)
+
+    assert small_preview['total_items'] == 2
+    assert large_preview['total_items'] == 16
+    assert large_preview['grand_total'] == 8 * 2 * 10 + 8 * 20
+    # One query for the product cart, one for the session cart
+    assert small_queries == large_queries == 2
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from models import db, Cart, Notification, NotificationArchive
+import jobs
+
+
+def add_read_notification(user_id, days_old):
+    # SQLite's clock (CURRENT_TIMESTAMP) is UTC
+    notification = Notification(
+        user_id=user_id,
+        message=f'{days_old} days old',
+        is_read=True,
+        created_at=datetime.utcnow() - timedelta(days=days_old)
+    )
+    db.session.add(notification)
+    db.session.commit()
+    return notification.id
+
+
+def test_retention_archives_by_database_clock(app, make_user):
+    user_id = make_user('Member').user_id
+    old = add_read_notification(user_id, 10)
+    add_read_notification(user_id, 2)
+
+    result = jobs.apply_notification_retention(retention_days=5)
+
+    assert result['archived'] == 1
+    assert [row.id for row in NotificationArchive.query.all()] == [old]
+    assert Notification.query.count() == 1
+
+
+def test_retention_honours_explicit_zero(app, make_user):
+    user_id = make_user('Member').user_id
+    add_read_notification(user_id, 10)
+
+    # The configured default (90 days) would keep it
+    assert jobs.apply_notification_retention(dry_run=True)['archived'] == 0
+    assert jobs.apply_notification_retention(retention_days=0, dry_run=True)['archived'] == 1
+
+
+def test_cart_sweeper_uses_database_clock(app, make_user):
+    stale = datetime.utcnow() - timedelta(days=10)
+    recent = datetime.utcnow() - timedelta(days=2)
+    idle_user, active_user = make_user('Member').user_id, make_user('Member').user_id
+    db.session.add_all([
+        Cart(user_id=idle_user, created_at=stale, updated_at=stale),
+        Cart(user_id=active_user, created_at=stale, updated_at=recent)
+    ])
+    db.session.commit()
+
+    result = jobs.sweep_carts(max_idle_days=5)
+
+    assert result['carts'] == 1
+    assert [cart.user_id for cart in Cart.query.all()] == [active_user]
@@ -0,0 +1,37 @@
+from models import db, Notification, NotificationCounter
+from Notifications import create_notification, create_notifications_bulk, mark_as_read, get_unread_count
+
+
+def stored_count(user_id):
+    db.session.expire_all()
+    counter = db.session.get(NotificationCounter, user_id)
+    return counter.unread_count if counter else None
+
+
+def test_first_write_creates_counter_with_full_count(app, make_user):
+    member = make_user('Member')
+    user_id = member.user_id
+    # Unread notifications from before the user had a counter
+    db.session.add_all([Notification(user_id=user_id, message='old', is_read=False) for _ in range(3)])
+    db.session.commit()
+    assert stored_count(user_id) is None
+
+    notification = create_notification(user_id, 'new', '/new')
+    assert stored_count(user_id) == 4
+
+    create_notifications_bulk([{'user_id': user_id, 'message': 'bulk'}] * 2)
+    assert stored_count(user_id) == 6
+
+    mark_as_read(notification.id)
+    assert stored_count(user_id) == 5
+    assert get_unread_count(user_id) == 5
+
+
+def test_first_read_creates_counter(app, make_user):
+    member = make_user('Member')
+    user_id = member.user_id
+    db.session.add_all([Notification(user_id=user_id, message='old', is_read=False) for _ in range(2)])
+    db.session.commit()
+
+    assert get_unread_count(user_id) == 2
+    assert stored_count(user_id) == 2
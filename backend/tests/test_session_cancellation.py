@@ -0,0 +1,30 @@
+from models import db, Booking, Notification, TrainerSession
+from Notifications import get_unread_count
+from conftest import auth_header
+
+
+def test_cancel_notifies_exactly_the_cancelled_members(client, make_user, make_session, make_booking):
+    trainer = make_user('Trainer')
+    confirmed = [make_user('Member') for _ in range(3)]
+    completed = make_user('Member')
+    session_id = make_session(trainer, current_bookings=4).id
+    session = db.session.get(TrainerSession, session_id)
+    for member in confirmed:
+        make_booking(member, session, 'confirmed')
+    make_booking(completed, session, 'completed')
+    member_ids = [member.user_id for member in confirmed]
+    completed_id = completed.user_id
+
+    response = client.post(f'/api/sessions/{session_id}/cancel', headers=auth_header(trainer))
+
+    assert response.status_code == 200
+    assert response.get_json()['cancelled_bookings'] == 3
+    db.session.remove()
+    cancelled = Booking.query.filter_by(session_id=session_id, status='cancelled').all()
+    notified = Notification.query.order_by(Notification.id).all()
+    assert sorted(n.user_id for n in notified) == sorted(member_ids)
+    assert sorted(n.link for n in notified) == sorted(f'/bookings/{b.id}' for b in cancelled)
+    assert [get_unread_count(user_id) for user_id in member_ids] == [1, 1, 1]
+    assert get_unread_count(completed_id) == 0
+    session = db.session.get(TrainerSession, session_id)
+    assert (session.is_active, session.current_bookings) == (False, 1)
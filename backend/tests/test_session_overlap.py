@@ -0,0 +1,69 @@
+from datetime import timedelta
+from models import db, TrainerSession
+from scheduling import overlap_enforced_by_database
+from conftest import auth_header
+
+OVERLAP_MESSAGE = (
+    'You already have a "Yoga" session scheduled from 10:00 to 11:00 on this date. '
+    'You cannot teach two classes at the same time.'
+)
+
+
+def test_sqlite_checks_overlaps_in_the_application(app):
+    assert not overlap_enforced_by_database()
+
+
+def test_create_overlapping_session_is_rejected(client, make_user, make_session, class_type):
+    trainer = make_user('Trainer')
+    existing = make_session(trainer, hour=10)
+    headers = auth_header(trainer)
+
+    response = client.post('/api/sessions/', headers=headers, json={
+        'class_type_id': class_type.id,
+        'date': existing.date.isoformat(),
+        'start_time': '10:30',
+        'end_time': '11:30',
+        'price': 20,
+        'max_members': 5
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()['error'] == OVERLAP_MESSAGE
+    assert TrainerSession.query.count() == 1
+
+
+def test_update_into_overlap_is_rejected(client, make_user, make_session):
+    trainer = make_user('Trainer')
+    make_session(trainer, hour=10)
+    moved = make_session(trainer, hour=14)
+    moved_id = moved.id
+    headers = auth_header(trainer)
+
+    response = client.put(f'/api/sessions/{moved_id}', headers=headers, json={
+        'start_time': '09:30',
+        'end_time': '10:30'
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()['error'] == OVERLAP_MESSAGE
+    # The request's session is torn down without committing
+    db.session.remove()
+    assert db.session.get(TrainerSession, moved_id).start_time.hour == 14
+
+
+def test_inactive_and_other_day_sessions_do_not_block(client, make_user, make_session, class_type):
+    trainer = make_user('Trainer')
+    inactive = make_session(trainer, hour=10, is_active=False)
+    make_session(trainer, day=inactive.date + timedelta(days=1), hour=10)
+    headers = auth_header(trainer)
+
+    response = client.post('/api/sessions/', headers=headers, json={
+        'class_type_id': class_type.id,
+        'date': inactive.date.isoformat(),
+        'start_time': '10:00',
+        'end_time': '11:00',
+        'price': 20,
+        'max_members': 5
+    })
+
+    assert response.status_code == 201
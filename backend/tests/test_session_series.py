@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+import pytest
+from models import TrainerSession
+from conftest import auth_header
+
+
+def series(class_type, start, end, **overrides):
+    body = {
+        'class_type_id': class_type.id,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'weekdays': [0, 3],
+        'start_time': '17:00',
+        'end_time': '18:00',
+        'price': 20,
+        'max_members': 5
+    }
+    body.update(overrides)
+    return body
+
+
+def test_series_range_is_bounded(client, make_user, class_type):
+    trainer = make_user('Trainer')
+    start = date.today() + timedelta(days=1)
+
+    response = client.post('/api/sessions/series', headers=auth_header(trainer),
+                           json=series(class_type, start, date(9999, 12, 31), every_weeks=1000))
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'A series can span at most 366 days'
+    assert TrainerSession.query.count() == 0
+
+
+def test_series_within_a_year_is_created(client, make_user, class_type):
+    trainer = make_user('Trainer')
+    start = date.today() + timedelta(days=1)
+
+    response = client.post('/api/sessions/series', headers=auth_header(trainer),
+                           json=series(class_type, start, start + timedelta(days=365), weekdays=[start.weekday()],
+                                       every_weeks=4))
+
+    assert response.status_code == 201
+    assert TrainerSession.query.count() == 14
+
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'weekdays': [True]}, 'weekdays must be a non-empty list of numbers from 0 (Monday) to 6 (Sunday)'),
+    ({'weekdays': [1.0]}, 'weekdays must be a non-empty list of numbers from 0 (Monday) to 6 (Sunday)'),
+    ({'every_weeks': True}, 'every_weeks must be a positive number'),
+])
+def test_series_rejects_non_integer_pattern(client, make_user, class_type, overrides, error):
+    trainer = make_user('Trainer')
+    start = date.today() + timedelta(days=1)
+
+    response = client.post('/api/sessions/series', headers=auth_header(trainer),
+                           json=series(class_type, start, start + timedelta(days=30), **overrides))
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+    assert TrainerSession.query.count() == 0
@@ -130,11 +130,43 @@ export default function NotificationBell() {
     }
   };
 
-  // Poll for updates & Play Sound
+  // Live updates over Server-Sent Events; fall back to polling if the stream is unavailable
   useEffect(() => {
-    fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
+    const token = getToken();
+    if (!token) return;
+
+    let interval = null;
+    const startPolling = () => {
+      if (interval) return;
+      fetchUnreadCount();
+      interval = setInterval(fetchUnreadCount, 30000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+      return () => clearInterval(interval);
+    }
+
+    const source = new EventSource(`${API_URL}/notifications/stream?jwt=${encodeURIComponent(token)}`);
+
+    source.addEventListener('unread_count', (e) => {
+      setUnreadCount(JSON.parse(e.data).count);
+    });
+
+    source.addEventListener('notification', (e) => {
+      const notification = JSON.parse(e.data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)].slice(0, 10));
+    });
+
+    // EventSource retries by itself; only give up on it once it is closed for good (e.g. 401)
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
   }, []);
 
   // Watch for count increase to play sound
@@ -28,89 +28,55 @@ const useCart = () => {
     }
   };
 
-  const addToCart = async (productId, quantity = 1) => {
+  // Applies a list of add/set/remove operations in one request and stores the returned cart
+  const patchCart = async (operations) => {
     try {
       setLoading(true);
       const token = getToken();
       
-      const response = await fetch(`${API_URL}/cart/cart/add`, {
-        method: 'POST',
+      const response = await fetch(`${API_URL}/cart/cart`, {
+        method: 'PATCH',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify({ product_id: productId, quantity })
+        body: JSON.stringify({ operations })
       });
 
       if (response.ok) {
-        await fetchCart();
+        const data = await response.json();
+        setCart(data);
         return { success: true };
       } else {
         const error = await response.json();
         return { success: false, error: error.error };
       }
     } catch (error) {
-      console.error('Error adding to cart:', error);
+      console.error('Error updating cart:', error);
       return { success: false, error: 'Network error' };
     } finally {
       setLoading(false);
     }
   };
 
-  const updateCartItem = async (cartItemId, quantity) => {
-    try {
-      setLoading(true);
-      const token = getToken();
-      
-      const response = await fetch(`${API_URL}/cart/cart/update/${cartItemId}`, {
-        method: 'PUT',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        },
-        body: JSON.stringify({ quantity })
-      });
+  const addToCart = (productId, quantity = 1) =>
+    patchCart([{ op: 'add', product_id: productId, quantity }]);
 
-      if (response.ok) {
-        await fetchCart();
-        return { success: true };
-      }
-    } catch (error) {
-      console.error('Error updating cart:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  const updateCartItem = (cartItemId, quantity) =>
+    patchCart([{ op: 'set', cart_item_id: cartItemId, quantity }]);
 
-  const removeFromCart = async (cartItemId) => {
-    try {
-      setLoading(true);
-      const token = getToken();
-      
-      const response = await fetch(`${API_URL}/cart/cart/remove/${cartItemId}`, {
-        method: 'DELETE',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      });
+  const removeFromCart = (cartItemId) =>
+    patchCart([{ op: 'remove', cart_item_id: cartItemId }]);
 
-      if (response.ok) {
-        await fetchCart();
-        return { success: true };
-      }
-    } catch (error) {
-      console.error('Error removing from cart:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Push a whole cart (e.g. one restored from local storage) as [{ product_id, quantity }]
+  const syncCart = (items) =>
+    patchCart(items.map(({ product_id, quantity }) => ({ op: 'set', product_id, quantity })));
 
   useEffect(() => {
     fetchCart();
   }, []);
 
-  return { cart, addToCart, updateCartItem, removeFromCart, loading, refreshCart: fetchCart };
+  return { cart, addToCart, updateCartItem, removeFromCart, syncCart, loading, refreshCart: fetchCart };
 };
 
 export default useCart;
\ No newline at end of file
@@ -258,7 +258,7 @@ export default function AdminBookingManagement() {
                 
                 {showFilters && (
                   <div className="absolute right-0 mt-2 w-48 bg-white border border-zinc-200 rounded-2xl shadow-2xl p-2 z-50">
-                    {['all', 'confirmed', 'completed', 'cancelled'].map((status) => (
+                    {['all', 'confirmed', 'completed', 'no_show', 'cancelled'].map((status) => (
                       <button
                         key={status}
                         onClick={() => {
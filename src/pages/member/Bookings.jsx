@@ -94,6 +94,8 @@ export default function BookingsPage() {
         return 'bg-red-100 text-red-600 border-red-200';
       case 'completed':
         return 'bg-blue-50 text-blue-700 border-blue-200';
+      case 'no_show':
+        return 'bg-amber-50 text-amber-700 border-amber-200';
       default:
         return 'bg-gray-50 text-gray-700 border-gray-200';
     }
@@ -113,7 +115,7 @@ export default function BookingsPage() {
     b.status === 'confirmed' && !isSessionInPast(b.date, b.start_time)
   );
   const pastBookings = bookings.filter(b => 
-    b.status === 'completed' || (b.status === 'confirmed' && isSessionInPast(b.date, b.start_time))
+    b.status === 'completed' || b.status === 'no_show' || (b.status === 'confirmed' && isSessionInPast(b.date, b.start_time))
   );
   const cancelledBookings = bookings.filter(b => b.status === 'cancelled');
 
@@ -154,6 +156,7 @@ export default function BookingsPage() {
               <option value="confirmed">Confirmed</option>
               <option value="cancelled">Cancelled</option>
               <option value="completed">Completed</option>
+              <option value="no_show">No-show</option>
             </select>
             <div className="absolute inset-y-0 right-0 pr-3 flex items-center pointer-events-none">
               <ChevronDown className="h-4 w-4 text-slate-400" />
@@ -30,6 +30,8 @@ const getClassImage = (classType) => {
 
 export default function SessionBookingPage() {
   const [sessions, setSessions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [classTypes, setClassTypes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedClassType, setSelectedClassType] = useState("");
@@ -55,15 +57,17 @@ export default function SessionBookingPage() {
     setTimeout(() => setNotification(null), 3000);
   };
 
-  const fetchSessions = async () => {
+  // Without a cursor the list is reloaded from the first page; with one the next page is appended
+  const fetchSessions = async (cursor = null) => {
     try {
-      setLoading(true);
+      cursor ? setLoadingMore(true) : setLoading(true);
       const token = getToken();
       const params = new URLSearchParams();
 
       if (selectedClassType) params.append("class_type_id", selectedClassType);
       if (dateFrom) params.append("date_from", dateFrom);
       if (dateTo) params.append("date_to", dateTo);
+      if (cursor) params.append("cursor", cursor);
 
       const response = await fetch(
         `${API_URL}/session-cart/available?${params}`,
@@ -77,7 +81,8 @@ export default function SessionBookingPage() {
 
       if (response.ok) {
         const data = await response.json();
-        setSessions(data.sessions);
+        setSessions((prev) => (cursor ? [...prev, ...data.sessions] : data.sessions));
+        setNextCursor(data.next_cursor);
       } else {
         showNotification("Failed to fetch sessions", "error");
       }
@@ -86,6 +91,7 @@ export default function SessionBookingPage() {
       showNotification("Network error", "error");
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -116,6 +122,50 @@ export default function SessionBookingPage() {
     fetchClassTypes();
   }, []);
 
+  // Keep seat counts on the loaded cards live without reloading the list
+  const refreshAvailability = async () => {
+    const ids = sessions.map((session) => session.id).slice(0, 200);
+    if (ids.length === 0) return;
+
+    try {
+      const token = getToken();
+      const response = await fetch(
+        `${API_URL}/session-cart/availability?ids=${ids.join(",")}`,
+        {
+          headers: {
+            Authorization: `Bearer ${token}`,
+            "Content-Type": "application/json",
+          },
+        }
+      );
+
+      if (response.ok) {
+        const data = await response.json();
+        setSessions((prev) =>
+          prev.map((session) => {
+            const seats = data.availability[session.id];
+            return seats
+              ? {
+                  ...session,
+                  current_bookings: seats.current_bookings,
+                  max_members: seats.max_members,
+                  spots_remaining: seats.spots_remaining,
+                  is_full: seats.is_full,
+                }
+              : session;
+          })
+        );
+      }
+    } catch (error) {
+      console.error("Error refreshing availability:", error);
+    }
+  };
+
+  useEffect(() => {
+    const interval = setInterval(refreshAvailability, 30000);
+    return () => clearInterval(interval);
+  }, [sessions]);
+
   const handleAddToCart = async (sessionId) => {
     const result = await addToSessionCart(sessionId);
     if (result.success) {
@@ -308,6 +358,18 @@ export default function SessionBookingPage() {
                 </div>
               </div>
             ))}
+
+            {nextCursor && (
+              <div className="flex justify-center">
+                <button
+                  onClick={() => fetchSessions(nextCursor)}
+                  disabled={loadingMore}
+                  className="px-6 py-2.5 rounded-lg font-medium bg-white border border-gray-200 text-gray-700 hover:bg-gray-50 shadow-sm disabled:opacity-50"
+                >
+                  {loadingMore ? "Loading..." : "Load more sessions"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
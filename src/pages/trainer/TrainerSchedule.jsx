@@ -17,12 +17,33 @@ export default function TrainerSchedulePage() {
 
   const getToken = () => localStorage.getItem('token');
 
+  const toDateParam = (date) => {
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${year}-${month}-${day}`;
+  };
+
+  // Only the visible month or week is fetched; the server answers 304 when it is unchanged
+  const getVisibleRange = () => {
+    if (viewMode === 'week') {
+      const weekDays = getWeekDays(currentDate);
+      return [weekDays[0], weekDays[6]];
+    }
+    return [
+      new Date(currentDate.getFullYear(), currentDate.getMonth(), 1),
+      new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 0)
+    ];
+  };
+
   // Fetch sessions
   const fetchSessions = async () => {
     try {
       setLoading(true);
       const token = getToken();
-      const response = await fetch(`${API_URL}/sessions`, {
+      const [from, to] = getVisibleRange();
+      const params = new URLSearchParams({ from: toDateParam(from), to: toDateParam(to) });
+      const response = await fetch(`${API_URL}/sessions/calendar?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
@@ -46,7 +67,7 @@ export default function TrainerSchedulePage() {
 
   useEffect(() => {
     fetchSessions();
-  }, []);
+  }, [currentDate, viewMode]);
 
   // Calendar helpers
   const getDaysInMonth = (date) => {